@@ -0,0 +1,84 @@
+# Aggregate messages/sec for N mailboxes checked through AccountPool at different pool sizes.
+#   python benchmarks/bench_accounts.py --accounts 16 --messages 100 --latency 0.02 --pool-sizes 1,2,4,8
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.imap_standin import StandinServer, make_message
+from neotracker.accounts import AccountPool
+from neotracker.db import Database
+from neotracker.imap import IdleWatcher, ImapSession, fetch_new
+
+
+class DrainWorker:
+    # Stand-in for the apps' MailWorker: one run_check pulls everything new for its account
+    def __init__(self, address, user, db, batch_size, done):
+        self.user = user
+        self.db = db
+        self.session = ImapSession(address, user, "bench", lambda msg: None, ssl=False)
+        self.watcher = IdleWatcher(self.session, lambda msg: None)
+        self.batch_size = batch_size
+        self.done = done
+        self.count = 0
+
+    def run_check(self):
+        self.count += sum(1 for _ in fetch_new(self.session, self.db, self.user, self.batch_size))
+        self.done.release()
+
+
+def run(address, accounts, pool_size, batch_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        done = threading.Semaphore(0)
+        db = Database(os.path.join(tmp, "bench.db"))
+        workers = [DrainWorker(address, f"student{i}", db, batch_size, done)
+                   for i in range(accounts)]
+        finished = threading.Event()
+
+        def wait_all():
+            for _ in workers:
+                done.acquire()
+            finished.set()
+
+        threading.Thread(target=wait_all, daemon=True).start()
+        start = time.perf_counter()
+        # Force round-robin polling so the pool size, not the account count, bounds concurrency
+        pool = AccountPool(workers, interval=3600, max_workers=pool_size, log=lambda msg: None)
+        runner = threading.Thread(target=pool._poll, args=(lambda: not finished.is_set(),))
+        runner.start()
+        finished.wait()
+        elapsed = time.perf_counter() - start
+        runner.join()
+        for worker in workers:
+            worker.session.close()
+        db.conn.close()
+    return sum(w.count for w in workers), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=16)
+    parser.add_argument("--messages", type=int, default=100, help="messages per mailbox")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated round trip per command (s)")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--pool-sizes", default="1,2,4,8,16")
+    args = parser.parse_args()
+
+    server = StandinServer(latency=args.latency).start()
+    for i in range(args.messages):
+        server.mailbox.add(make_message(f"Fwd: Shortlist {i}", "Candidate list attached. " * 50))
+
+    print(f"{args.accounts} accounts x {args.messages} messages, {args.latency * 1000:.1f} ms per command")
+    base = None
+    for size in map(int, args.pool_sizes.split(",")):
+        count, elapsed = run(server.address, args.accounts, size, args.batch_size)
+        base = base or elapsed
+        print(f"pool {size:>3}  {count:>6} msgs  {elapsed:7.3f}s  {count / elapsed:9.1f} msg/s  x{base / elapsed:5.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Writes/sec into history.db from several worker threads: the old commit-per-statement connection
+# (rollback journal, one lock) vs Database's WAL writer queue with group commits; then History
+# search latency (FTS + filters, first page and count) over a --history row table.
+#   python benchmarks/bench_db.py --threads 8 --writes 500 --history 100000
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from neotracker.db import Database
+
+
+class Legacy:
+    # The pre-WAL Database: every statement commits on its own
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE matches (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, company TEXT, source TEXT, details TEXT)")
+        self.conn.execute("CREATE TABLE sync_state (account TEXT, folder TEXT, uidvalidity INTEGER, last_uid INTEGER, "
+                          "highestmodseq INTEGER, PRIMARY KEY (account, folder))")
+        self.lock = threading.RLock()
+
+    def log_match(self, company, source, details, message_id=None, attachment=""):
+        with self.lock:
+            cursor = self.conn.execute("INSERT INTO matches (timestamp, company, source, details) VALUES (datetime(), ?, ?, ?)",
+                                       (company, source, details))
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def save_checkpoint(self, account, folder, uidvalidity, last_uid, highestmodseq=None):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)", (account, folder, uidvalidity, last_uid, highestmodseq))
+            self.conn.commit()
+
+    def flush(self):
+        pass
+
+
+def run(db, threads, writes):
+    # Each thread is one account: a checkpoint per mail, a history row for every tenth
+    def work(n):
+        for uid in range(writes):
+            db.save_checkpoint(f"user{n}", "INBOX", 1, uid)
+            if uid % 10 == 0:
+                db.log_match("Acme", "Email", f"subject {uid}", f"<{n}.{uid}@x>", "")
+    start = time.perf_counter()
+    pool = [threading.Thread(target=work, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    db.flush()
+    return time.perf_counter() - start
+
+
+def search_latency(db, rows):
+    companies = ["Amazon", "Goldman Sachs", "Infosys", "Zoho", "TCS", "Microsoft"] + [f"Company {i}" for i in range(300)]
+    rng = random.Random(1)
+
+    def fill(conn):
+        for i in range(rows):
+            company = rng.choice(companies)
+            conn.execute("INSERT INTO matches (timestamp, company, source, details, message_id) VALUES (?, ?, ?, ?, ?)",
+                         (f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00", company,
+                          rng.choice(["Email Body", "Excel"]), f"Fwd: {company} shortlist round {i % 5}", f"<h{i}@x>"))
+    db._write(fill, wait=True)
+    for query in [{}, dict(text="amazon"), dict(text="amazon", since="2025-05-01", until="2025-05-31"),
+                  dict(text="goldman", source="Excel"), dict(source="Email")]:
+        start = time.perf_counter()
+        total = db.count(**query)
+        db.search(limit=200, **query)
+        print(f"  {str(query) if query else 'all':<70} {total:>7} rows  {(time.perf_counter() - start) * 1000:6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=500, help="checkpoint saves per thread")
+    parser.add_argument("--history", type=int, default=100000, help="rows for the search benchmark")
+    args = parser.parse_args()
+    total = args.threads * (args.writes + (args.writes + 9) // 10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = run(Legacy(os.path.join(tmp, "legacy.db")), args.threads, args.writes)
+        print(f"commit per write   {total / legacy:8.0f} writes/s  {legacy:6.2f}s")
+        db = Database(os.path.join(tmp, "history.db"))
+        queued = run(db, args.threads, args.writes)
+        print(f"WAL writer queue   {total / queued:8.0f} writes/s  {queued:6.2f}s  {db.commits} commits  x{legacy / queued:.1f}")
+        # Reprocessing the same mail again adds nothing
+        rows = len(db.get_all())
+        run(db, args.threads, args.writes)
+        print(f"rows after reprocessing: {len(db.get_all())} (was {rows})")
+        print(f"search over {args.history + rows} rows (count + first page):")
+        search_latency(db, args.history)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
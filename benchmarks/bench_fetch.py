@@ -0,0 +1,83 @@
+# Messages/sec and bytes on the wire for the old one-FETCH-per-message loop vs batched UID FETCH.
+#   python benchmarks/bench_fetch.py --messages 200 --latency 0.005 --attachment-kb 2048
+import argparse
+import imaplib
+import os
+import sys
+import tempfile
+import time
+from email.message import EmailMessage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.imap_standin import StandinServer, make_message
+from neotracker.db import Database
+from neotracker.imap import ImapSession, fetch_new
+
+
+def run_legacy(address):
+    # The original loop: SEARCH, then FETCH (RFC822) + STORE \Seen for every message
+    host, port = address.split(":")
+    mail = imaplib.IMAP4(host, int(port))
+    mail.login("bench", "bench")
+    mail.select("inbox")
+    _, data = mail.search(None, "ALL")
+    count = 0
+    for num in data[0].split():
+        _, msg_data = mail.fetch(num, "(RFC822)")
+        count += bool(msg_data[0][1])
+        mail.store(num, "+FLAGS", "\\Seen")
+    mail.logout()
+    return count
+
+
+def run_batched(address, batch_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        session = ImapSession(address, "bench", "bench", lambda msg: None, ssl=False)
+        count = sum(1 for _ in fetch_new(session, db, "bench", batch_size))
+        session.close()
+        db.conn.close()
+    return count
+
+
+def timed(label, fn, server):
+    start_cmds, start_bytes = server.commands, server.bytes_sent
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {count:>5} msgs  {elapsed:7.3f}s  {count / elapsed:9.1f} msg/s  "
+          f"{server.commands - start_cmds:>5} cmds  {(server.bytes_sent - start_bytes) / 1e6:8.2f} MB")
+
+
+def shortlist_mail(i, attachment_kb):
+    if not attachment_kb:
+        return make_message(f"Fwd: Shortlist {i}", "Candidate list attached. " * 50)
+    msg = EmailMessage()
+    msg["Subject"] = f"Fwd: Shortlist {i}"
+    msg.set_content("Candidate list attached. " * 50)
+    msg.add_attachment(os.urandom(attachment_kb * 1024), maintype="application", subtype="pdf", filename="brochure.pdf")
+    msg.add_attachment(b"PK" + os.urandom(8 * 1024), maintype="application", subtype="octet-stream", filename="shortlist.xlsx")
+    return msg.as_bytes()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated round trip per command (s)")
+    parser.add_argument("--batch-sizes", default="1,10,50,200")
+    parser.add_argument("--attachment-kb", type=int, default=0, help="add an unrelated PDF of this size to every mail")
+    args = parser.parse_args()
+
+    server = StandinServer(latency=args.latency).start()
+    for i in range(args.messages):
+        server.mailbox.add(shortlist_mail(i, args.attachment_kb))
+
+    print(f"{args.messages} messages, {args.latency * 1000:.1f} ms per command")
+    timed("legacy (per message)", lambda: run_legacy(server.address), server)
+    for size in map(int, args.batch_sizes.split(",")):
+        timed(f"batched ({size})", lambda: run_batched(server.address, size), server)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
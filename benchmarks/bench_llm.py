@@ -0,0 +1,110 @@
+# Emails/sec for company extraction with AI mode on: one blocking Ollama call per mail (the old
+# ask_ollama loop) vs LlmScheduler batching and running prompts concurrently, against a local fake.
+#   python benchmarks/bench_llm.py --emails 50 --latency 0.5 --per-item 0.05 --parallel 2
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.ollama_standin import OllamaStandin, company_of
+from neotracker.llm import LlmScheduler
+
+COMPANIES = ["Goldman Sachs", "Infosys", "Amazon", "Deloitte", "Zoho", "TCS", "Microsoft", "Accenture"]
+
+
+def subjects(n):
+    return [f"Fwd: {COMPANIES[i % len(COMPANIES)]} – OA Shortlist {i}" for i in range(n)]
+
+
+def run_sequential(url, items):
+    names = []
+    for subject in items:
+        prompt = f"Extract ONLY the company name from this email subject: '{subject}'. Do not output anything else."
+        resp = requests.post(f"{url}/api/generate", json={"model": "llama3", "prompt": prompt, "stream": False}, timeout=30)
+        names.append(resp.json().get("response", "").strip())
+    return names
+
+
+def run_cold_start(load_time, warm):
+    # First lookup after start-up against a model that takes load_time to load
+    server = OllamaStandin(latency=0.2, per_item=0, parallel=1, load_time=load_time).start()
+    llm = LlmScheduler(url=server.url, deadline=load_time + 5, log=lambda msg: None)
+    if warm:
+        llm.client.warm_up()
+        time.sleep(load_time + 0.2)     # the app keeps starting up meanwhile (IMAP login, first fetch)
+    start = time.perf_counter()
+    llm.extract("Fwd: Infosys – Interview")
+    elapsed = time.perf_counter() - start
+    llm.close()
+    server.shutdown()
+    return elapsed
+
+
+def run_scheduled(url, items, parallel, batch_size, submitters):
+    llm = LlmScheduler(url=url, batch_size=batch_size, concurrency=parallel, deadline=60, log=print)
+    # The pipeline's enrich stage submits as mail arrives; several submitters mimic several accounts
+    with ThreadPoolExecutor(submitters) as pool:
+        names = list(pool.map(llm.extract, items))
+    llm.close()
+    return names, llm.prompts
+
+
+def report(label, items, names, elapsed, prompts):
+    wrong = sum(n != company_of(s) for s, n in zip(items, names))
+    print(f"{label:<24} {len(items) / elapsed:7.1f} emails/s  {elapsed:6.2f}s  {prompts:>3} prompts  {wrong} wrong")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="fixed model time per prompt (s)")
+    parser.add_argument("--per-item", type=float, default=0.05, help="extra model time per subject in a batch (s)")
+    parser.add_argument("--parallel", type=int, default=2, help="prompts the fake server runs at once")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    args = parser.parse_args()
+
+    server = OllamaStandin(args.latency, args.per_item, args.parallel).start()
+    items = subjects(args.emails)
+    print(f"{args.emails} emails, {args.latency * 1000:.0f} ms + {args.per_item * 1000:.0f} ms/subject per prompt, "
+          f"{args.parallel} parallel")
+
+    start = time.perf_counter()
+    names = run_sequential(server.url, items)
+    report("sequential", items, names, time.perf_counter() - start, len(items))
+    connections, requests_sent = server.connections, server.requests
+
+    for size in map(int, args.batch_sizes.split(",")):
+        start = time.perf_counter()
+        names, prompts = run_scheduled(server.url, items, args.parallel, size, submitters=args.emails)
+        report(f"scheduler (batch {size})", items, names, time.perf_counter() - start, prompts)
+    print(f"scheduler HTTP connections: {server.connections - connections} for {server.requests - requests_sent} requests "
+          f"(num_predict {server.last_request['options']['num_predict']} on the last batch)")
+
+    print(f"first lookup, cold model (2s load): {run_cold_start(2.0, False):.2f}s, "
+          f"after warm-up: {run_cold_start(2.0, True):.2f}s")
+
+    # Deadlines: a model slower than the caller's budget must not hold the caller up
+    slow = OllamaStandin(latency=3.0, per_item=0, parallel=1).start()
+    llm = LlmScheduler(url=slow.url, deadline=0.5, log=lambda msg: None)
+    start = time.perf_counter()
+    result = llm.extract("Fwd: Zoho – Interview")
+    print(f"deadline 0.5s vs 3s model: {result!r} after {time.perf_counter() - start:.2f}s")
+    llm.close()
+
+    # Health cache / circuit breaker: with Ollama gone, lookups fall back at once instead of each timing out
+    slow.shutdown()
+    slow.server_close()
+    llm = LlmScheduler(url=slow.url, deadline=5, log=lambda msg: None)
+    start = time.perf_counter()
+    results = [llm.extract(f"Fwd: Zoho – Round {i}") for i in range(10)]
+    print(f"Ollama down: 10 lookups -> {set(results)} in {time.perf_counter() - start:.2f}s")
+    llm.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
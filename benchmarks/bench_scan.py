@@ -0,0 +1,62 @@
+# Spreadsheets/sec for a batch of shortlist attachments scanned in-thread vs on ScanPool processes.
+#   python benchmarks/bench_scan.py --workbooks 20 --rows 20000 --processes 1,2,4,8
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import as_completed
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from neotracker.excel import scan_workbook
+from neotracker.matcher import matcher_for
+from neotracker.scanpool import ScanPool
+
+
+def make_workbook(rows, seed):
+    # Minimal .xlsx: one sheet of inline strings, no sharedStrings/workbook parts (the scanner's fallback path)
+    out = io.BytesIO()
+    body = "".join(f'<row r="{r}"><c r="A{r}" t="inlineStr"><is><t>Student {seed}-{r}</t></is></c>'
+                   f'<c r="B{r}" t="inlineStr"><is><t>NEO{seed:02d}{r:06d}</t></is></c><c r="C{r}"><v>{r * 7}</v></c></row>'
+                   for r in range(1, rows + 1))
+    sheet = ('<?xml version="1.0" encoding="UTF-8"?><worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+             f"<sheetData>{body}</sheetData></worksheet>")
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("xl/worksheets/Shortlist.xml", sheet)
+    return out.getvalue()
+
+
+def run(payloads, matcher, processes):
+    pool = ScanPool(processes)
+    start = time.perf_counter()
+    if processes:
+        futures = [pool.submit(p, matcher) for p in payloads]
+        results = [f.result() for f in as_completed(futures)]
+    else:
+        results = [scan_workbook(io.BytesIO(p), matcher) for p in payloads]
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return len(results), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workbooks", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--processes", default="1,2,4,8")
+    args = parser.parse_args()
+
+    payloads = [make_workbook(args.rows, i) for i in range(args.workbooks)]
+    matcher = matcher_for("NEO99000001")     # never present: every sheet is read to the end
+    print(f"{args.workbooks} workbooks x {args.rows} rows, {sum(map(len, payloads)) / 1e6:.1f} MB zipped, "
+          f"{os.cpu_count()} CPUs")
+    count, base = run(payloads, matcher, 0)
+    print(f"in-thread      {count:>4} sheets  {base:7.2f}s  {count / base:6.1f} sheets/s")
+    for n in map(int, args.processes.split(",")):
+        count, elapsed = run(payloads, matcher, n)
+        print(f"{n:>2} processes   {count:>4} sheets  {elapsed:7.2f}s  {count / elapsed:6.1f} sheets/s  x{base / elapsed:4.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Start-up budget for the apps: import time per top-level module (python -X importtime) and time
+# to first window (the app prints "first-window" under NEOTRACKER_STARTUP_PROBE and exits). Exits 1
+# if a budget is blown, a module meant to load lazily shows up at start-up, an entry point fails to
+# import or a GUI app exits without reporting its window. --allow-missing only reports targets that
+# can't start here (toolkit not installed, winreg off Windows, no display).
+#   python benchmarks/bench_startup.py --import-budget 800 --window-budget 2500
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# GUI apps only need these once monitoring starts, a match fires or the window is minimized
+GUI_LAZY = ["requests", "pystray", "PIL", "winotify", "plyer", "ollama", "openpyxl"]
+# The headless watcher must never load a GUI toolkit
+HEADLESS_LAZY = ["tkinter", "customtkinter", "pystray", "PIL", "winotify", "plyer"]
+# (label, code importing the entry point's module, argv launching it, modules that must not load)
+TARGETS = [
+    ("gui_app_themed", "import gui_app_themed", ["gui_app_themed.py"], GUI_LAZY),
+    ("gui_app", "import gui_app", ["gui_app.py"], GUI_LAZY),
+    ("mac", "import sys; sys.path.insert(0, 'mac'); import main", ["mac/main.py"], GUI_LAZY),
+    ("headless", "import neotracker.__main__", ["-m", "neotracker", "watch", "--help"], HEADLESS_LAZY),
+]
+IMPORT_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def env():
+    # Throwaway HOME: the apps create their settings file on import
+    home = tempfile.mkdtemp()
+    return dict(os.environ, HOME=home, USERPROFILE=home, PYTHONPATH=ROOT, NEOTRACKER_STARTUP_PROBE="1")
+
+
+def import_profile(code, baseline=()):
+    """({package: ms spent importing its modules}, error or None) for a fresh interpreter
+    importing code; modules already loaded at interpreter start-up (baseline) are left out."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env(),
+                          capture_output=True, text=True, timeout=120)
+    packages = {}
+    for self_us, _, _, name in IMPORT_RE.findall(proc.stderr):
+        if name not in baseline:
+            package = name.partition(".")[0]
+            packages[package] = packages.get(package, 0) + int(self_us) / 1000
+    error = proc.stderr.strip().splitlines()[-1] if proc.returncode else None
+    return packages, error
+
+
+def first_window(argv, timeout, window=True):
+    """Seconds until the app reports its first window (without one: until it exits cleanly),
+    or (None, reason)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable] + argv, cwd=ROOT, env=env(), stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True)
+    try:
+        out, err = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        return None, "timed out"
+    if "first-window" in out or (not window and proc.returncode == 0):
+        return time.perf_counter() - start, None
+    if proc.returncode == 0:
+        return None, "exited without reporting a window"
+    return None, (err.strip().splitlines() or ["no output"])[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--import-budget", type=float, default=800, help="ms to import an entry point, all modules included")
+    parser.add_argument("--window-budget", type=float, default=2500, help="ms from launch to first window")
+    parser.add_argument("--top", type=int, default=8, help="slowest packages to list")
+    parser.add_argument("--targets", default=",".join(t[0] for t in TARGETS))
+    parser.add_argument("--allow-missing", action="store_true", help="report targets that can't start here instead of failing")
+    args = parser.parse_args()
+
+    failures = []
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], env=env(), capture_output=True, text=True)
+    baseline = {name for _, _, _, name in IMPORT_RE.findall(proc.stderr)}
+    for label, code, argv, lazy in TARGETS:
+        if label not in args.targets.split(","):
+            continue
+        modules, error = import_profile(code, baseline)
+        total = sum(modules.values())
+        print(f"{label}: imports {total:7.1f} ms" + (f"  (import failed: {error})" if error else ""))
+        for name, ms in sorted(modules.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {ms:7.1f} ms  {name}")
+        eager = [name for name in lazy if name in modules]
+        if eager:
+            failures.append(f"{label}: imported at start-up but meant to be lazy: {', '.join(eager)}")
+        if error:
+            if not args.allow_missing:
+                failures.append(f"{label}: import failed: {error}")
+            continue
+        if total > args.import_budget:
+            failures.append(f"{label}: imports take {total:.0f} ms > {args.import_budget:.0f} ms")
+        window = argv[0].endswith(".py")
+        elapsed, reason = first_window(argv, timeout=max(30, args.window_budget / 100), window=window)
+        if elapsed is None:
+            print(f"    first window: none ({reason})")
+            if not args.allow_missing:
+                failures.append(f"{label}: no first window: {reason}")
+            continue
+        print(f"    {'first window' if window else 'ran to exit'} {elapsed * 1000:7.1f} ms")
+        if elapsed * 1000 > args.window_budget:
+            failures.append(f"{label}: first window after {elapsed * 1000:.0f} ms > {args.window_budget:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
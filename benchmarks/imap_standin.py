@@ -0,0 +1,247 @@
+# Minimal in-process IMAP server for benchmarks. Speaks just enough of RFC 3501 for imaplib
+# and neotracker.imap, with an optional artificial round-trip delay per command.
+import email
+import re
+import socket
+import socketserver
+import threading
+import time
+
+
+class Mailbox:
+    def __init__(self, uidvalidity=1):
+        self.messages = []          # [uid, raw bytes]
+        self.parsed = {}            # uid -> (email.message, envelope, bodystructure)
+        self.uidvalidity = uidvalidity
+        self.uidnext = 1
+        self.cond = threading.Condition()
+
+    def add(self, raw):
+        # Real servers keep BODYSTRUCTURE precomputed, so build it up front rather than per FETCH
+        msg = email.message_from_bytes(raw)
+        with self.cond:
+            self.parsed[self.uidnext] = (msg, envelope(msg), bodystructure(msg))
+            self.messages.append([self.uidnext, raw])
+            self.uidnext += 1
+            self.cond.notify_all()
+
+    def max_uid(self):
+        return self.messages[-1][0] if self.messages else 0
+
+
+def parse_set(spec, max_uid):
+    out = set()
+    for part in spec.split(","):
+        a, _, b = part.partition(":")
+        a = max_uid if a == "*" else int(a)
+        b = a if not b else (max_uid if b == "*" else int(b))
+        out.update(range(min(a, b), max(a, b) + 1))
+    return out
+
+
+# --- FETCH RESPONSE BUILDING ---
+def _string(value):
+    if value is None:
+        return b"NIL"
+    data = value.encode() if isinstance(value, str) else value
+    if re.search(rb'[\r\n"\\\x80-\xff]', data):
+        return b"{%d}\r\n" % len(data) + data
+    return b'"' + data + b'"'
+
+
+def _plist(pairs):
+    return b"(" + b" ".join(_string(k.upper()) + b" " + _string(v) for k, v in pairs) + b")" if pairs else b"NIL"
+
+
+def envelope(msg):
+    fields = [msg["Date"], msg["Subject"]] + [None] * 7 + [msg["Message-ID"]]
+    return b"(" + b" ".join(_string(f) for f in fields) + b")"
+
+
+def bodystructure(part):
+    if part.is_multipart() and part.get_content_type() != "message/rfc822":
+        children = b"".join(bodystructure(p) for p in part.get_payload())
+        return b"(" + children + b" " + _string(part.get_content_subtype().upper()) + b")"
+    maintype, subtype = part.get_content_maintype().upper(), part.get_content_subtype().upper()
+    params = [(k, v) for k, v in part.get_params() or [] if "/" not in k]
+    encoding = (part["Content-Transfer-Encoding"] or "7BIT").upper()
+    disp = part.get_content_disposition()
+    disposition = (b"(" + _string(disp.upper()) + b" " + _plist([("filename", part.get_filename())]) + b")"
+                   if disp and part.get_filename() else b"NIL")
+    if part.get_content_type() == "message/rfc822":
+        inner = part.get_payload()[0]
+        raw = inner.as_bytes()
+        return (b"(" + b" ".join([_string(maintype), _string(subtype), _plist(params), b"NIL NIL", _string(encoding),
+                                  str(len(raw)).encode(), envelope(inner), bodystructure(inner),
+                                  str(raw.count(b"\n")).encode(), b"NIL", disposition]) + b")")
+    payload = part.get_payload(decode=False)
+    payload = payload.encode() if isinstance(payload, str) else payload
+    head = [_string(maintype), _string(subtype), _plist(params), b"NIL NIL", _string(encoding), str(len(payload)).encode()]
+    if maintype == "TEXT":
+        head.append(str(payload.count(b"\n")).encode())
+    return b"(" + b" ".join(head + [b"NIL", disposition]) + b")"
+
+
+def section_bytes(msg, section):
+    node = msg
+    for n in map(int, section.split(".")):
+        if node.get_content_type() == "message/rfc822":
+            node = node.get_payload()[0]
+        if node.is_multipart():
+            node = node.get_payload()[n - 1]
+    payload = node.get_payload(decode=False)
+    return payload.encode() if isinstance(payload, str) else node.as_bytes()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        # Otherwise Nagle + delayed ACK add ~40 ms to every small response
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def announce(self):
+        # Like real servers: each new message is reported once, untagged, with whatever command runs next
+        box = self.server.mailbox
+        if len(box.messages) != self.announced:
+            self.announced = len(box.messages)
+            self.send(f"* {self.announced} EXISTS\r\n")
+
+    def send(self, data):
+        self.wfile.write(data if isinstance(data, bytes) else data.encode())
+        self.wfile.flush()
+
+    def handle(self):
+        srv = self.server
+        box = srv.mailbox
+        self.send("* OK stand-in ready\r\n")
+        self.announced = len(box.messages)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode().rstrip("\r\n").partition(" ")
+            cmd, _, args = rest.partition(" ")
+            cmd = cmd.upper()
+            if cmd == "UID":
+                cmd, _, args = args.partition(" ")
+                cmd = cmd.upper()
+            srv.commands += 1
+            if srv.latency:
+                time.sleep(srv.latency)
+            if cmd not in ("IDLE", "SELECT", "EXAMINE", "LOGOUT"):
+                self.announce()
+
+            if cmd == "CAPABILITY":
+                self.send(f"* CAPABILITY {srv.capabilities}\r\n{tag} OK done\r\n")
+            elif cmd == "LOGIN":
+                self.send(f"{tag} OK logged in\r\n")
+            elif cmd in ("SELECT", "EXAMINE"):
+                self.announced = len(box.messages)
+                self.send(f"* {len(box.messages)} EXISTS\r\n* OK [UIDVALIDITY {box.uidvalidity}]\r\n"
+                          f"* OK [UIDNEXT {box.uidnext}]\r\n{tag} OK [READ-WRITE] selected\r\n")
+            elif cmd == "NOOP":
+                self.send(f"{tag} OK noop\r\n")
+            elif cmd == "LOGOUT":
+                self.send(f"* BYE\r\n{tag} OK bye\r\n")
+                return
+            elif cmd == "SEARCH":
+                self.search(tag, args)
+            elif cmd == "FETCH":
+                self.fetch(tag, args)
+            elif cmd == "STORE":
+                self.send(f"{tag} OK store\r\n")
+            elif cmd == "IDLE":
+                self.idle(tag)
+            else:
+                self.send(f"{tag} BAD unsupported {cmd}\r\n")
+
+    def search(self, tag, args):
+        box = self.server.mailbox
+        hits = [uid for uid, _ in box.messages]
+        m = re.search(r"UID (\S+)", args)
+        if m:
+            wanted = parse_set(m.group(1), box.max_uid())
+            hits = [uid for uid in hits if uid in wanted]
+        # OR-chains of TEXT keys, or one X-GM-RAW '"a" OR "b"' query
+        needles = []
+        for key, value in re.findall(r'(TEXT|X-GM-RAW) "((?:[^"\\]|\\.)*)"', args):
+            value = re.sub(r"\\(.)", r"\1", value)
+            needles += [v.strip('"') for v in value.split(" OR ")] if key == "X-GM-RAW" else [value]
+        if needles:
+            needles = [n.encode().lower() for n in needles]
+            hits = [uid for uid, raw in box.messages if uid in hits and any(n in raw.lower() for n in needles)]
+        self.send(f"* SEARCH {' '.join(map(str, hits))}\r\n{tag} OK search\r\n")
+
+    def fetch(self, tag, args):
+        box = self.server.mailbox
+        spec, _, items = args.partition(" ")
+        wanted = parse_set(spec, box.max_uid())
+        for seq, (uid, raw) in enumerate(box.messages, 1):
+            if uid not in wanted:
+                continue
+            out = [b"UID %d" % uid]
+            msg, env, structure = box.parsed[uid]
+            if "ENVELOPE" in items:
+                out.append(b"ENVELOPE " + env)
+            if "BODYSTRUCTURE" in items:
+                out.append(b"BODYSTRUCTURE " + structure)
+            if "RFC822" in items or "BODY[]" in items or "BODY.PEEK[]" in items:
+                out.append(b"BODY[] {%d}\r\n" % len(raw) + raw)
+            for section, start, length in re.findall(r"BODY(?:\.PEEK)?\[([\d.]+)\](?:<(\d+)\.(\d+)>)?", items):
+                data = section_bytes(msg, section)
+                name = f"BODY[{section}]"
+                if start:
+                    data, name = data[int(start):int(start) + int(length)], f"{name}<{start}>"
+                out.append(f"{name} {{{len(data)}}}\r\n".encode() + data)
+            self.server.bytes_sent += sum(map(len, out))
+            self.send(b"* %d FETCH (" % seq + b" ".join(out) + b")\r\n")
+        self.send(f"{tag} OK fetch\r\n")
+
+    def idle(self, tag):
+        box = self.server.mailbox
+        self.send("+ idling\r\n")
+        count = self.announced
+        done = threading.Event()
+
+        def wait_done():
+            self.rfile.readline()
+            done.set()
+            with box.cond:
+                box.cond.notify_all()
+
+        reader = threading.Thread(target=wait_done, daemon=True)
+        reader.start()
+        with box.cond:
+            while not done.is_set() and len(box.messages) == count:
+                box.cond.wait(0.5)
+            if len(box.messages) != count:
+                self.announce()
+        reader.join()
+        self.send(f"{tag} OK idle done\r\n")
+
+
+class StandinServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, mailbox=None, latency=0.0, capabilities="IMAP4rev1 IDLE"):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.mailbox = mailbox or Mailbox()
+        self.latency = latency
+        self.capabilities = capabilities
+        self.commands = 0
+        self.bytes_sent = 0
+
+    @property
+    def address(self):
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def make_message(subject, body="Hello", date=None):
+    date = date or time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime())
+    return (f"Subject: {subject}\r\nFrom: placement@example.edu\r\nDate: {date}\r\n"
+            f"Content-Type: text/plain; charset=utf-8\r\n\r\n{body}\r\n").encode()
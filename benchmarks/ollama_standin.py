@@ -0,0 +1,89 @@
+# Minimal local Ollama look-alike for benchmarks: /, /api/tags and non-streaming /api/generate.
+# Answers with the text before " - " / " – " in each subject, after a configurable model delay.
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LINE_RE = re.compile(r"^(\d+)\. (.*)$", re.MULTILINE)
+PREFIX_RE = re.compile(r"^(?:(?:re|fwd?)\s*:\s*)+", re.IGNORECASE)
+
+
+def company_of(subject):
+    subject = PREFIX_RE.sub("", subject).strip()
+    return re.split(r"\s+[-–|:]\s+", subject)[0] or "Unknown"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body, status=200):
+        data = json.dumps(body).encode() if not isinstance(body, bytes) else body
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self.reply({"models": [{"name": f"{self.server.model}:latest"}]})
+        else:
+            self.reply(b"Ollama is running")
+
+    def do_POST(self):
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        server = self.server
+        if self.path != "/api/generate":
+            return self.reply({"error": "not found"}, 404)
+        server.requests += 1
+        server.last_request = req
+        prompt = req.get("prompt", "")
+        lines = LINE_RE.findall(prompt)
+        # The model serves `parallel` prompts at once; the rest wait their turn like in Ollama
+        with server.slots:
+            if not server.loaded:
+                time.sleep(server.load_time)
+                server.loaded = True
+            if not prompt:
+                # Empty prompt: Ollama just loads the model
+                return self.reply({"model": req.get("model"), "response": "", "done": True})
+            time.sleep(server.latency + server.per_item * max(1, len(lines)))
+        if req.get("format") == "json" and lines:
+            answer = json.dumps({n: company_of(s) for n, s in lines})
+        else:
+            m = re.search(r"'(.*)'", prompt)
+            answer = company_of(m.group(1) if m else prompt)
+        self.reply({"model": req.get("model"), "response": answer, "done": True})
+
+
+class OllamaStandin(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.5, per_item=0.05, parallel=2, load_time=0.0, model="llama3"):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.latency = latency          # fixed cost of one prompt (prompt eval, scheduling)
+        self.per_item = per_item        # extra generation time per subject in a batch
+        self.slots = threading.Semaphore(parallel)
+        self.load_time = load_time      # cold model load on the first request
+        self.loaded = load_time == 0
+        self.model = model
+        self.requests = 0
+        self.connections = 0
+        self.last_request = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
@@ -1,6 +1,11 @@
 import PyInstaller.__main__
 import customtkinter
 import os
+import sys
+
+# python build.py           -> dist/Neotracker.exe, one file (unpacks to a temp dir on every launch)
+# python build.py --onedir  -> dist/Neotracker/Neotracker.exe, a folder that starts without unpacking
+ONEDIR = "--onedir" in sys.argv[1:]
 
 # Get the location of the customtkinter library files
 ctk_path = os.path.dirname(customtkinter.__file__)
@@ -9,7 +14,7 @@ ctk_path = os.path.dirname(customtkinter.__file__)
 args = [
     'gui_app_themed.py',                            # Your main script
     '--name=Neotracker',      # New name to distinguish it
-    '--onefile',                          # Create a single file
+    '--onedir' if ONEDIR else '--onefile',  # Folder (fast cold start) or single file (easy to share)
     
     # --- CHANGE: ENABLE CONSOLE FOR DEBUGGING ---
     '--noconsole',                          # SHOW the black window so we can see errors
@@ -29,6 +34,6 @@ args = [
     '--clean',                            
 ]
 
-print("🚀 Building DEBUG .exe... (Console Enabled)...")
+print(f"🚀 Building .exe ({'onedir' if ONEDIR else 'onefile'})...")
 PyInstaller.__main__.run(args)
-print("✅ Build Complete! Check the 'dist' folder for 'PlacementWatcher_Debug.exe'.")
\ No newline at end of file
+print(f"✅ Build Complete! Check the 'dist' folder for {'Neotracker/Neotracker.exe' if ONEDIR else 'Neotracker.exe'}.")
\ No newline at end of file
@@ -1,19 +1,17 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox
+import multiprocessing
 import threading
-import time
 import os
-import imaplib
-import email
-import sqlite3
 import logging
-from datetime import datetime
-from email.header import decode_header
 from dotenv import load_dotenv, set_key
-from openpyxl import load_workbook
-from plyer import notification
-import ollama
+from neotracker.accounts import AccountPool, load_accounts
+from neotracker import worker
+from neotracker.db import Database
+from neotracker.excel import describe, exact
+from neotracker.logbuffer import LOG_DRAIN_MS, LogBuffer, show
+from neotracker.scanpool import ScanPool
 
 # --- CONFIGURATION ---
 ctk.set_appearance_mode("Dark")
@@ -28,146 +26,33 @@ if not os.path.exists(ENV_FILE):
 load_dotenv(ENV_FILE)
 
 # --- BACKEND LOGIC ---
-class Database:
-    def __init__(self, db_name="history.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        self.create_table()
-
-    def create_table(self):
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS matches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                company TEXT,
-                source TEXT,
-                details TEXT
-            )
-        """)
-        self.conn.commit()
-
-    def log_match(self, company, source, details):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.conn.execute("INSERT INTO matches (timestamp, company, source, details) VALUES (?, ?, ?, ?)",
-                          (ts, company, source, details))
-        self.conn.commit()
-
-    def get_all(self):
-        cursor = self.conn.execute("SELECT timestamp, company, source, details FROM matches ORDER BY id DESC")
-        return cursor.fetchall()
-
-class MailWorker:
-    def __init__(self, log_callback, success_callback):
-        self.running = False
-        self.log = log_callback
-        self.on_success = success_callback
-        self.db = Database()
-        
-    def get_config(self, key):
-        return os.getenv(key, "")
-
-    def extract_company(self, subject, body):
-        try:
-            prompt = f"Extract company name from subject: '{subject}' and body snippet: '{body[:500]}'. Reply ONLY with name."
-            response = ollama.chat(model="llama3", messages=[{"role": "user", "content": prompt}])
-            return response["message"]["content"].strip()
-        except:
-            return "Unknown Company"
-
-    def check_excel(self, path, target_id):
-        try:
-            wb = load_workbook(path, data_only=True)
-            text = ""
-            for sheet in wb.worksheets:
-                for row in sheet.iter_rows(values_only=True):
-                    row_str = " ".join([str(c) for c in row if c])
-                    if target_id in row_str:
-                        return True, "Exact Match"
-                    text += row_str + "\n"
-            
-            # LLM Check if no exact match
-            prompt = f"My ID is {target_id}. Check this list: {text[:2000]}. Does it contain my ID? YES/NO only."
-            res = ollama.chat(model="llama3", messages=[{"role": "user", "content": prompt}])
-            return "YES" in res["message"]["content"].upper(), "LLM Match"
-        except Exception as e:
-            self.log(f"Excel Error: {e}")
-            return False, ""
-
-    def run_check(self):
-        email_user = self.get_config("EMAIL_USER")
-        email_pass = self.get_config("EMAIL_PASS")
-        target_id = self.get_config("TARGET_ID")
-        
-        if not (email_user and email_pass and target_id):
-            self.log("ERROR: Missing Credentials in Settings!")
-            self.running = False
-            return
-
-        self.log("--- Starting Mail Check Cycle ---")
-        
-        try:
-            mail = imaplib.IMAP4_SSL(self.get_config("IMAP_SERVER"))
-            mail.login(email_user, email_pass)
-            mail.select("inbox")
-            
-            today = datetime.now().strftime("%d-%b-%Y")
-            # Using generic search for demonstration, refine sender list as needed
-            status, data = mail.search(None, f'(UNSEEN SINCE "{today}")')
-
-            if not data or not data[0]:
-                self.log("No new unread mails.")
-            else:
-                for num in data[0].split():
-                    _, msg_data = mail.fetch(num, '(RFC822)')
-                    msg = email.message_from_bytes(msg_data[0][1])
-                    
-                    subject = decode_header(msg["Subject"])[0][0]
-                    if isinstance(subject, bytes): subject = subject.decode()
-                    
-                    self.log(f"Checking: {subject[:30]}...")
-
-                    # Check Body
-                    body = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                body += part.get_payload(decode=True).decode(errors="ignore")
-                    else:
-                        body = msg.get_payload(decode=True).decode(errors="ignore")
-
-                    company = self.extract_company(subject, body)
-
-                    if target_id in (subject + body):
-                        self.log(f"MATCH FOUND in Body: {company}")
-                        self.db.log_match(company, "Email Body", subject)
-                        self.on_success(company)
-                    
-                    # Check Attachments
-                    for part in msg.walk():
-                        if part.get_content_disposition() == "attachment":
-                            fname = part.get_filename()
-                            if fname and fname.endswith(".xlsx"):
-                                path = f"attachments/{fname}"
-                                os.makedirs("attachments", exist_ok=True)
-                                with open(path, "wb") as f: f.write(part.get_payload(decode=True))
-                                
-                                match, reason = self.check_excel(path, target_id)
-                                if match:
-                                    self.log(f"MATCH FOUND in Excel: {company}")
-                                    self.db.log_match(company, "Excel File", f"{fname} ({reason})")
-                                    self.on_success(company)
-                    
-                    mail.store(num, '+FLAGS', '\\Seen')
-
-            mail.logout()
-        except Exception as e:
-            self.log(f"Connection Error: {e}")
-
-        self.log("--- Cycle Finished ---")
+class MailWorker(worker.MailWorker):
+    MESSAGES = {
+        **worker.MailWorker.MESSAGES,
+        "no_credentials": "ERROR: Missing Credentials in Settings!",
+        "start": "--- Starting Mail Check Cycle ---",
+        "summary": "Pipeline: {summary} | company cache {hits:.0%} hits",
+        "no_mail": "No new mails.",
+        "done": "--- Cycle Finished ---",
+        "duplicate": "Already recorded: {subject:.30}",
+        "body_match": "MATCH FOUND in Body: {company} ({ids})",
+        "excel_match": "MATCH FOUND in Excel: {company} ({ids})",
+        "possible_match": "Possible match (no alert): {company} ({details})",
+        "company": "Company identified: {company}",
+    }
+
+    def excel_verdict(self, found):
+        return f"{'Exact' if exact(found) else 'Fuzzy'} Match: {describe(found)}"
+
+    def excel_hit(self, fname, reason):
+        return "Excel File", f"{fname} ({reason})"
 
 # --- GUI FRONTEND ---
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
+        self.logs = LogBuffer.from_env()
+        self.after(LOG_DRAIN_MS, self.drain_log)
         self.title("Placement ID Watcher")
         self.geometry("900x600")
         
@@ -201,6 +86,7 @@ class App(ctk.CTk):
         
         self.worker_thread = None
         self.worker_running = False
+        self.db = Database()    # one connection for History and the workers
         
         self.show_dashboard()
 
@@ -265,16 +151,17 @@ class App(ctk.CTk):
         frame.pack(fill="both", expand=True)
 
     def log(self, message):
-        def _update():
-            self.log_box.configure(state="normal")
-            self.log_box.insert("end", f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-            self.log_box.see("end")
-            self.log_box.configure(state="disabled")
-        self.after(0, _update)
+        # Any thread: queued here, drawn by drain_log on the Tk thread
+        self.logs.write(message)
+
+    def drain_log(self):
+        show(self.log_box, self.logs.drain(), self.logs.max_lines)
+        self.after(LOG_DRAIN_MS, self.drain_log)
 
-    def on_match_found(self, company):
-        notification.notify(title="Shortlist Found!", message=f"Company: {company}", timeout=10)
-        self.log(f"!!! ALERT: FOUND MATCH FOR {company} !!!")
+    def on_match_found(self, company, ids):
+        from plyer import notification
+        notification.notify(title="Shortlist Found!", message=f"Company: {company} ({', '.join(ids)})", timeout=10)
+        self.log(f"!!! ALERT: FOUND MATCH FOR {company} ({', '.join(ids)}) !!!")
 
     def toggle_monitoring(self):
         if not self.worker_running:
@@ -290,13 +177,26 @@ class App(ctk.CTk):
             self.log("Stopping after current cycle...")
 
     def bg_loop(self):
-        worker = MailWorker(self.log, self.on_match_found)
-        while self.worker_running:
-            worker.run_check()
-            # Sleep in small chunks to allow faster stopping
-            for _ in range(int(os.getenv("CHECK_INTERVAL", 30))):
-                if not self.worker_running: break
-                time.sleep(1)
+        from neotracker.llm import LlmScheduler     # pulls in requests; not needed until monitoring starts
+        try:
+            accounts = load_accounts()
+        except Exception as e:
+            self.log(f"ERROR: Accounts file unreadable: {e}")
+            self.worker_running = False
+            return
+        multi, db, scanner = len(accounts) > 1, self.db, ScanPool()
+        llm = LlmScheduler("llama3", concurrency=int(os.getenv("LLM_CONCURRENCY", 2)), log=self.log)
+        llm.client.warm_up()
+        workers = [MailWorker((lambda m, u=a.user: self.log(f"[{u}] {m}")) if multi else self.log, self.on_match_found, None, a, db, scanner, llm,
+                              self.refresh_history)
+                   for a in accounts]
+        # IDLE returns as soon as new mail lands; without IDLE it sleeps in small chunks to allow faster stopping.
+        # Up to MAX_WORKERS accounts each get their own thread, beyond that they are polled in turn.
+        pool = AccountPool(workers, int(os.getenv("CHECK_INTERVAL", 30)), int(os.getenv("MAX_WORKERS", 8)), self.log)
+        pool.run(lambda: self.worker_running)
+        scanner.close()
+        db.flush()
+        llm.close()
 
     def save_settings(self):
         for key, entry in self.entries.items():
@@ -304,12 +204,18 @@ class App(ctk.CTk):
         load_dotenv(ENV_FILE, override=True)
         messagebox.showinfo("Saved", "Settings saved successfully! Restart monitoring to apply.")
 
+    def refresh_history(self):
+        self.after(0, lambda: self.hist_frame.winfo_ismapped() and self.load_history_data())
+
     def load_history_data(self):
         for i in self.tree.get_children(): self.tree.delete(i)
-        db = Database()
-        for row in db.get_all():
+        for row in self.db.get_all():
             self.tree.insert("", "end", values=row)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # spreadsheet scan workers in the frozen .exe
     app = App()
+    if os.getenv("NEOTRACKER_STARTUP_PROBE"):
+        # benchmarks/bench_startup.py: report once the window is up, then exit
+        app.after(0, lambda: (print("first-window", flush=True), app.destroy()))
     app.mainloop()  
\ No newline at end of file
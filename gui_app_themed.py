@@ -1,24 +1,19 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
+import multiprocessing
+import re
 import threading
-import time
 import os
-import imaplib
-import email
-import sqlite3
-import re
 import sys
 import winreg
-import requests
 import json
 import webbrowser
-from datetime import datetime
-from email.header import decode_header
 from dotenv import load_dotenv, set_key
-from openpyxl import load_workbook
-from winotify import Notification, audio
-import pystray
-from PIL import Image, ImageDraw
+from neotracker.accounts import AccountPool, load_accounts
+from neotracker.db import Database
+from neotracker.logbuffer import LOG_DRAIN_MS, LogBuffer, show
+from neotracker.scanpool import ScanPool
+from neotracker.worker import MailWorker
 
 # --- 🎨 VISUAL DESIGN GUIDELINES (CYBERPUNK THEME) ---
 THEME = {
@@ -36,6 +31,11 @@ THEME = {
     "font_header": ("Arial", 20, "bold")
 }
 
+HISTORY_PAGE = 200          # rows fetched per keyset query
+HISTORY_PAGES_KEPT = 5      # pages held around the view; the least recently shown is dropped first
+HISTORY_ROW_HEIGHT = 44     # px per history row, spacing included
+DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("dark-blue")
 
@@ -53,172 +53,119 @@ except PermissionError:
 except Exception as e:
     print(f"⚠️ Config Error: {e}")
 
-# --- BACKEND LOGIC ---
-class Database:
-    def __init__(self, db_name="history.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        self.create_table()
-
-    def create_table(self):
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS matches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                company TEXT,
-                source TEXT,
-                details TEXT
-            )
-        """)
-        self.conn.commit()
-
-    def log_match(self, company, source, details):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.conn.execute("INSERT INTO matches (timestamp, company, source, details) VALUES (?, ?, ?, ?)",
-                          (ts, company, source, details))
-        self.conn.commit()
-
-    def get_all(self):
-        cursor = self.conn.execute("SELECT timestamp, company, source, details FROM matches ORDER BY id DESC")
-        return cursor.fetchall()
-
-    def clear_all(self):
-        self.conn.execute("DELETE FROM matches")
-        self.conn.commit()
-
-class MailWorker:
-    def __init__(self, log_callback, success_callback, update_ai_status):
-        self.running = False
-        self.log = log_callback
-        self.on_success = success_callback
-        self.update_ai_status = update_ai_status
-        self.db = Database()
-        self.ai_available = False
-        
-    def get_config(self, key): return os.getenv(key, "")
-
-    def check_ollama_status(self):
-        try:
-            response = requests.get("http://localhost:11434/", timeout=1)
-            if response.status_code == 200:
-                self.ai_available = True
-                self.update_ai_status(True)
-                return True
-        except:
-            pass
-        self.ai_available = False
-        self.update_ai_status(False)
-        return False
-
-    def ask_ollama(self, prompt):
-        model = self.get_config("AI_MODEL") or "llama3"
-        url = "http://localhost:11434/api/generate"
-        data = {"model": model, "prompt": prompt, "stream": False}
-        try:
-            resp = requests.post(url, json=data, timeout=10)
-            return resp.json().get("response", "").strip()
-        except Exception as e:
-            self.log(f"⚠️ AI Failed: {e}")
-            return None
-
-    def extract_company(self, subject):
-        if self.ai_available:
-            prompt = f"Extract ONLY the company name from this email subject: '{subject}'. Do not output anything else. If no company is found, return 'Unknown'."
-            result = self.ask_ollama(prompt)
-            if result:
-                return result.replace('"', '').replace("'", "")
-
-        # Regex Fallback
-        clean = subject.replace("Fwd:", "").replace("Re:", "").strip()
-        junk = [r"Shortlist(ed)?", r"Selected", r"regarding", r"Placement", r"Hiring", r"Online Test", r"Interview", r"Round", r"Batch", r"202\d"]
-        for j in junk:
-            clean = re.sub(j, "", clean, flags=re.IGNORECASE)
-        return clean.strip(" -:|")[:30] if clean.strip() else "Unknown"
-
-    def check_excel_simple(self, path, target_id):
-        try:
-            wb = load_workbook(path, data_only=True)
-            for sheet in wb.worksheets:
-                for row in sheet.iter_rows(values_only=True):
-                    row_str = " ".join([str(c) for c in row if c]).upper()
-                    if target_id.upper() in row_str:
-                        return True, "Exact Match in Excel"
-            return False, ""
-        except Exception as e:
-            self.log(f"Excel Error: {e}")
-            return False, ""
-
-    def run_check(self):
-        email_user = self.get_config("EMAIL_USER")
-        email_pass = self.get_config("EMAIL_PASS")
-        target_id = self.get_config("TARGET_ID")
-        
-        if not (email_user and email_pass and target_id):
-            self.log("❌ ERROR: Credentials missing.")
-            self.running = False
-            return
-
-        self.check_ollama_status()
-        self.log(f">>> SCANNING... (AI Mode: {'ON' if self.ai_available else 'OFF'})")
+# --- UI COMPONENTS ---
+class HistoryList(ctk.CTkFrame):
+    """Virtualized match history: only the rows that fit on screen exist as widgets and scrolling
+    just relabels them. Rows are fetched a page at a time as the view reaches them, by keyset on id
+    from the page above or with one seek when the scrollbar jumps, and only a few pages are kept,
+    so the tab costs the same with 50 matches or 50,000."""
+
+    def __init__(self, master, db, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+        self.db = db
+        self.pages, self.total, self.top = {}, 0, 0     # pages: {page number: rows}, oldest use first
+        self.filters = {}       # Database.search() filters: text, since, until, source
+        self.widgets = []       # [(frame, (time, company, source))], reused for whichever rows are visible
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.empty = ctk.CTkLabel(self.body, text="No history found.", text_color="grey")
+        self.body.bind("<Configure>", lambda e: self.render())
+        self._bind_wheel(self.body)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+        widget.bind("<Button-4>", lambda e: self.scroll(-3))
+        widget.bind("<Button-5>", lambda e: self.scroll(3))
+
+    def _make_row(self):
+        frame = ctk.CTkFrame(self.body, fg_color=THEME["bg_card"], corner_radius=6, height=HISTORY_ROW_HEIGHT - 4)
+        frame.grid_propagate(False)
+        frame.grid_rowconfigure(0, weight=1)
+        frame.grid_columnconfigure(0, weight=2)
+        frame.grid_columnconfigure(1, weight=3)
+        frame.grid_columnconfigure(2, weight=2)
+        labels = (ctk.CTkLabel(frame, text="", font=("Consolas", 11), text_color="grey"),
+                  ctk.CTkLabel(frame, text="", font=("Arial", 12, "bold"), text_color=THEME["accent_blue"]),
+                  ctk.CTkLabel(frame, text="", font=("Arial", 11), text_color="white"))
+        for col, label in enumerate(labels):
+            label.grid(row=0, column=col, padx=10, sticky="w")
+            self._bind_wheel(label)
+        self._bind_wheel(frame)
+        return frame, labels
+
+    def _page(self, n):
+        rows = self.pages.pop(n, None)
+        if rows is None:
+            # Keyset from the page above when it is held, otherwise (a scrollbar jump) one seek straight there
+            above = self.pages.get(n - 1)
+            if above:
+                rows = self.db.search(before_id=above[-1][0], limit=HISTORY_PAGE, **self.filters)
+            else:
+                rows = self.db.search(offset=n * HISTORY_PAGE, limit=HISTORY_PAGE, **self.filters)
+        self.pages[n] = rows
+        while len(self.pages) > HISTORY_PAGES_KEPT:
+            del self.pages[next(iter(self.pages))]
+        return rows
+
+    def _row(self, i):
+        rows = self._page(i // HISTORY_PAGE)
+        return rows[i % HISTORY_PAGE] if i % HISTORY_PAGE < len(rows) else None
+
+    def reload(self):
+        self.total = self.db.count(**self.filters)
+        self.pages = {}
+        self.render()
+
+    def set_filters(self, **filters):
+        self.filters = {k: v for k, v in filters.items() if v}
+        self.top = 0
+        self.reload()
+
+    def render(self):
+        visible = max(1, self.body.winfo_height() // HISTORY_ROW_HEIGHT)
+        self.top = max(0, min(self.top, self.total - visible))
+        if self.total:
+            self.empty.pack_forget()
+        else:
+            self.empty.pack(pady=20)
+        while len(self.widgets) < visible:
+            self.widgets.append(self._make_row())
+        # Visible rows are always a prefix of self.widgets, so pack order stays top to bottom
+        for i, (frame, labels) in enumerate(self.widgets):
+            row = self._row(self.top + i) if i < visible and self.top + i < self.total else None
+            if row:
+                for label, text in zip(labels, row[1:4]):
+                    if label.cget("text") != (text or ""):
+                        label.configure(text=text or "")
+                if not frame.winfo_ismapped():
+                    frame.pack(fill="x", pady=2)
+            elif frame.winfo_ismapped():
+                frame.pack_forget()
+        if self.total > visible:
+            self.scrollbar.set(self.top / self.total, (self.top + visible) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
 
-        try:
-            mail = imaplib.IMAP4_SSL(self.get_config("IMAP_SERVER"))
-            mail.login(email_user, email_pass)
-            mail.select("inbox")
-            
-            today = datetime.now().strftime("%d-%b-%Y")
-            status, data = mail.search(None, f'(UNSEEN SINCE "{today}")')
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
 
-            if not data or not data[0]:
-                self.log("No new emails.")
-            else:
-                for num in data[0].split():
-                    _, msg_data = mail.fetch(num, '(RFC822)')
-                    msg = email.message_from_bytes(msg_data[0][1])
-                    
-                    subject_bytes = msg["Subject"]
-                    try:
-                        decoded = decode_header(subject_bytes)[0]
-                        subject = decoded[0]
-                        if isinstance(subject, bytes): subject = subject.decode(decoded[1] or 'utf-8')
-                    except: subject = str(subject_bytes)
-
-                    company = self.extract_company(str(subject))
-                    self.log(f"Checking: {company}...")
-
-                    body = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                body += part.get_payload(decode=True).decode(errors="ignore")
-                    else:
-                        body = msg.get_payload(decode=True).decode(errors="ignore")
-
-                    if target_id in (str(subject) + body):
-                        self.on_success(company)
-                        self.db.log_match(company, "Email Body", subject)
-                    
-                    for part in msg.walk():
-                        if part.get_content_disposition() == "attachment":
-                            fname = part.get_filename()
-                            if fname and fname.endswith(".xlsx"):
-                                os.makedirs("attachments", exist_ok=True)
-                                path = f"attachments/{fname}"
-                                with open(path, "wb") as f: f.write(part.get_payload(decode=True))
-                                
-                                match, reason = self.check_excel_simple(path, target_id)
-                                if match:
-                                    self.on_success(company)
-                                    self.db.log_match(company, "Excel", f"{fname} ({reason})")
-                                    
-                    mail.store(num, '+FLAGS', '\\Seen')
-            mail.logout()
-        except Exception as e:
-            self.log(f"Connection Error: {e}")
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = int(float(value) * self.total)
+            self.render()
+        else:
+            visible = max(1, self.body.winfo_height() // HISTORY_ROW_HEIGHT)
+            self.scroll(int(value) * (visible if unit == "pages" else 1))
 
 # --- GUI ---
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
+        self.logs = LogBuffer.from_env("%H:%M")
+        self.after(LOG_DRAIN_MS, self.drain_log)
         self.title("ID WATCHER (Hybrid AI)")
         self.geometry("900x600")
         self.configure(fg_color=THEME["bg_primary"])
@@ -255,14 +202,18 @@ class App(ctk.CTk):
         self.main_frame.grid(row=0, column=1, sticky="nsew", padx=30, pady=30)
         
         self.worker_running = False
+        self.db = Database()
         self.create_frames()
         self.show_dashboard()
 
         self.after(100, self.check_auto_start)
-        threading.Thread(target=self.setup_tray, daemon=True).start()
+        self.tray_icon = None   # created on first minimize, so pystray/PIL stay off the start-up path
 
     # --- SYSTEM TRAY ---
     def setup_tray(self):
+        import pystray
+        from PIL import Image, ImageDraw
+
         if os.path.exists("icon.ico"):
             image = Image.open("icon.ico")
         else:
@@ -277,6 +228,10 @@ class App(ctk.CTk):
 
     def minimize_to_tray(self):
         self.withdraw()
+        if self.tray_icon is None:
+            self.tray_icon = False      # starting; setup_tray replaces it with the icon
+            threading.Thread(target=self.setup_tray, daemon=True).start()
+        from winotify import Notification
         icon_path = os.path.abspath("icon.ico") if os.path.exists("icon.ico") else ""
         toast = Notification(app_id="Placement Watcher", title="Minimized to Tray", msg="Scanning in background...", duration="short", icon=icon_path)
         toast.show()
@@ -286,7 +241,7 @@ class App(ctk.CTk):
 
     def quit_app(self, icon, item):
         self.worker_running = False
-        self.tray_icon.stop()
+        icon.stop()
         self.quit()
 
     # --- APP LOGIC ---
@@ -333,6 +288,24 @@ class App(ctk.CTk):
         ctk.CTkLabel(header, text="MATCH HISTORY", font=THEME["font_header"], text_color="white").pack(side="left")
         ctk.CTkButton(header, text="CLEAR ALL", command=self.clear_history, fg_color=THEME["bg_card"], hover_color=THEME["accent_red"], text_color="white", width=100).pack(side="right")
 
+        # Search: words match company/source/details (FTS), dates are inclusive YYYY-MM-DD
+        filter_bar = ctk.CTkFrame(self.hist_frame, fg_color="transparent")
+        filter_bar.pack(fill="x", pady=(0, 10))
+        entry_style = dict(height=32, fg_color=THEME["bg_card"], border_color=THEME["border_color"], text_color="white")
+        self.hist_search = ctk.CTkEntry(filter_bar, placeholder_text="Search company, source, details...", **entry_style)
+        self.hist_search.pack(side="left", fill="x", expand=True)
+        self.hist_source = ctk.CTkOptionMenu(filter_bar, values=["All sources", "Email", "Excel"], width=120, height=32,
+                                             fg_color=THEME["bg_card"], button_color=THEME["bg_card"], command=lambda _: self.filter_history())
+        self.hist_source.pack(side="left", padx=(8, 0))
+        self.hist_since = ctk.CTkEntry(filter_bar, placeholder_text="From YYYY-MM-DD", width=130, **entry_style)
+        self.hist_since.pack(side="left", padx=(8, 0))
+        self.hist_until = ctk.CTkEntry(filter_bar, placeholder_text="To YYYY-MM-DD", width=130, **entry_style)
+        self.hist_until.pack(side="left", padx=(8, 0))
+        ctk.CTkButton(filter_bar, text="SEARCH", command=self.filter_history, fg_color=THEME["accent_blue"], hover_color="#00B8E6",
+                      text_color="black", width=90, height=32).pack(side="left", padx=(8, 0))
+        for ent in (self.hist_search, self.hist_since, self.hist_until):
+            ent.bind("<Return>", lambda e: self.filter_history())
+
         table_header = ctk.CTkFrame(self.hist_frame, fg_color=THEME["bg_card"], height=35, corner_radius=8)
         table_header.pack(fill="x", pady=(0,5))
         table_header.grid_columnconfigure(0, weight=2)
@@ -341,8 +314,8 @@ class App(ctk.CTk):
         ctk.CTkLabel(table_header, text="TIME", font=("Consolas", 11, "bold"), text_color="grey").grid(row=0, column=0, padx=10, pady=8, sticky="w")
         ctk.CTkLabel(table_header, text="COMPANY", font=("Consolas", 11, "bold"), text_color="grey").grid(row=0, column=1, padx=10, pady=8, sticky="w")
         ctk.CTkLabel(table_header, text="SOURCE", font=("Consolas", 11, "bold"), text_color="grey").grid(row=0, column=2, padx=10, pady=8, sticky="w")
-        self.tree_scroll = ctk.CTkScrollableFrame(self.hist_frame, fg_color="transparent")
-        self.tree_scroll.pack(fill="both", expand=True)
+        self.history = HistoryList(self.hist_frame, self.db)
+        self.history.pack(fill="both", expand=True)
 
         # Settings - CHANGED TO SCROLLABLE FRAME
         self.set_frame = ctk.CTkScrollableFrame(self.main_frame, fg_color="transparent")
@@ -391,8 +364,12 @@ class App(ctk.CTk):
     def show_settings(self): self.switch_frame(self.set_frame)
 
     def log(self, msg):
-        self.log_box.insert("end", f"[{datetime.now().strftime('%H:%M')}] {msg}\n")
-        self.log_box.see("end")
+        # Called from worker threads: never touch Tk here, drain_log draws the batch every 100 ms
+        self.logs.write(msg)
+
+    def drain_log(self):
+        show(self.log_box, self.logs.drain(), self.logs.max_lines)
+        self.after(LOG_DRAIN_MS, self.drain_log)
 
     def toggle_monitoring(self):
         if not self.worker_running:
@@ -405,37 +382,56 @@ class App(ctk.CTk):
             self.log("Stopping...")
 
     def bg_loop(self):
-        def send_alert(company_name):
+        # Deferred until monitoring starts: requests (via the LLM client) and winotify cost start-up time
+        from neotracker.llm import LlmScheduler
+        from winotify import Notification
+
+        def send_alert(company_name, ids):
             icon_path = os.path.abspath("icon.ico") if os.path.exists("icon.ico") else ""
-            toast = Notification(app_id="Placement Watcher", title="MATCH FOUND!", msg=f"Company: {company_name}", duration="long", icon=icon_path)
+            toast = Notification(app_id="Placement Watcher", title="MATCH FOUND!", msg=f"Company: {company_name} ({', '.join(ids)})",
+                                 duration="long", icon=icon_path)
             toast.show()
 
-        worker = MailWorker(self.log, send_alert, self.update_ai_indicator)
-        while self.worker_running:
-            worker.run_check()
-            for _ in range(int(os.getenv("CHECK_INTERVAL", 30))):
-                if not self.worker_running: break
-                time.sleep(1)
+        try:
+            accounts = load_accounts()
+        except Exception as e:
+            self.log(f"❌ ERROR: Accounts file unreadable: {e}")
+            self.worker_running = False
+            return
+        multi, db, scanner = len(accounts) > 1, self.db, ScanPool()
+        llm = LlmScheduler(os.getenv("AI_MODEL") or "llama3", concurrency=int(os.getenv("LLM_CONCURRENCY", 2)), log=self.log)
+        llm.client.warm_up()
+        workers = [MailWorker((lambda m, u=a.user: self.log(f"[{u}] {m}")) if multi else self.log, send_alert, self.update_ai_indicator, a, db, scanner, llm,
+                              self.refresh_history)
+                   for a in accounts]
+        # Each account IDLEs on its own thread (polling CHECK_INTERVAL if the server can't push);
+        # past MAX_WORKERS mailboxes they share the pool round-robin
+        pool = AccountPool(workers, int(os.getenv("CHECK_INTERVAL", 30)), int(os.getenv("MAX_WORKERS", 8)), self.log)
+        pool.run(lambda: self.worker_running)
+        scanner.close()
+        db.flush()
+        llm.close()
+
+    def refresh_history(self):
+        # Called from worker threads when a company name lands; only redraw if History is on screen
+        self.after(0, lambda: self.hist_frame.winfo_ismapped() and self.load_history())
 
     def load_history(self):
-        for w in self.tree_scroll.winfo_children(): w.destroy()
-        rows = Database().get_all()
-        if not rows:
-            ctk.CTkLabel(self.tree_scroll, text="No history found.", text_color="grey").pack(pady=20)
-            return
-        for row in rows:
-            row_frame = ctk.CTkFrame(self.tree_scroll, fg_color=THEME["bg_card"], corner_radius=6)
-            row_frame.pack(fill="x", pady=2)
-            row_frame.grid_columnconfigure(0, weight=2)
-            row_frame.grid_columnconfigure(1, weight=3)
-            row_frame.grid_columnconfigure(2, weight=2)
-            ctk.CTkLabel(row_frame, text=row[0], font=("Consolas", 11), text_color="grey").grid(row=0, column=0, padx=10, pady=10, sticky="w")
-            ctk.CTkLabel(row_frame, text=row[1], font=("Arial", 12, "bold"), text_color=THEME["accent_blue"]).grid(row=0, column=1, padx=10, pady=10, sticky="w")
-            ctk.CTkLabel(row_frame, text=row[2], font=("Arial", 11), text_color="white").grid(row=0, column=2, padx=10, pady=10, sticky="w")
+        self.history.reload()
+
+    def filter_history(self):
+        since, until = self.hist_since.get().strip(), self.hist_until.get().strip()
+        for value in (since, until):
+            if value and not DATE_RE.fullmatch(value):
+                messagebox.showerror("Search", f"'{value}' is not a date like 2024-05-31.")
+                return
+        source = self.hist_source.get()
+        self.history.set_filters(text=self.hist_search.get().strip(), since=since, until=until,
+                                 source="" if source == "All sources" else source)
 
     def clear_history(self):
         if messagebox.askyesno("Confirm", "Are you sure you want to delete all history?"):
-            Database().clear_all()
+            self.db.clear_all()
             self.load_history()
 
     def save_settings(self):
@@ -462,5 +458,9 @@ class App(ctk.CTk):
         winreg.CloseKey(key)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # spreadsheet scan workers in the frozen .exe
     app = App()
+    if os.getenv("NEOTRACKER_STARTUP_PROBE"):
+        # benchmarks/bench_startup.py: report once the window is up, then exit
+        app.after(0, lambda: (print("first-window", flush=True), app.destroy()))
     app.mainloop()
\ No newline at end of file
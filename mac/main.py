@@ -1,17 +1,18 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
+import multiprocessing
 import threading
-import time
 import os
-import imaplib
-import email
-import sqlite3
-from datetime import datetime
-from email.header import decode_header
+import sys
 from dotenv import load_dotenv, set_key
-from openpyxl import load_workbook
-from plyer import notification
-import ollama
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from neotracker.accounts import AccountPool, load_accounts
+from neotracker import worker
+from neotracker.db import Database
+from neotracker.excel import describe, exact
+from neotracker.logbuffer import LOG_DRAIN_MS, LogBuffer, show
+from neotracker.scanpool import ScanPool
 
 # --- THEME & MAC OPTIMIZATION ---
 THEME = {
@@ -37,49 +38,34 @@ if not os.path.exists(ENV_FILE):
     with open(ENV_FILE, "w") as f:
         f.write("EMAIL_USER=\nEMAIL_PASS=\nIMAP_SERVER=imap.gmail.com\nTARGET_ID=\nCHECK_INTERVAL=30\n")
 load_dotenv(ENV_FILE)
-
-# --- BACKEND: DATABASE ---
-class Database:
-    def __init__(self, db_name="history.db"):
-        self.db_path = os.path.join(os.path.dirname(__file__), db_name)
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.create_table()
-
-    def create_table(self):
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS matches (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                company TEXT,
-                source TEXT,
-                details TEXT
-            )
-        """)
-        self.conn.commit()
-
-    def log_match(self, company, source, details):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.conn.execute("INSERT INTO matches (timestamp, company, source, details) VALUES (?, ?, ?, ?)",
-                          (ts, company, source, details))
-        self.conn.commit()
-
-    def get_all(self):
-        try:
-            cursor = self.conn.execute("SELECT timestamp, company, source, details FROM matches ORDER BY id DESC")
-            return cursor.fetchall()
-        except: return []
+DB_PATH = os.path.join(os.path.dirname(__file__), "history.db")
 
 # --- BACKEND: MAIL WORKER WITH OLLAMA FALLBACK ---
-class MailWorker:
-    def __init__(self, log_callback, success_callback):
-        self.log = log_callback
-        self.on_success = success_callback
-        self.db = Database()
-        self.ai_enabled = self._verify_ollama()
-        
+class MailWorker(worker.MailWorker):
+    MESSAGES = {
+        **worker.MailWorker.MESSAGES,
+        "no_credentials": "CRITICAL: Check credentials in Settings!",
+        "start": "",
+        "summary": "PIPELINE: {summary} | company cache {hits:.0%} hits",
+        "no_mail": "Scan: Clear. No new signals.",
+        "error": "Network: {error}",
+        "checking": "Processing: {subject:.25}...",
+        "duplicate": "SKIP: already logged ({subject:.25})",
+        "body_match": "MATCH: {company} ({ids})",
+        "excel_match": "ATTACHMENT MATCH: {company} ({details})",
+        "possible_match": "POSSIBLE MATCH (no alert): {company} ({details})",
+        "company": "AI: resolved company -> {company}",
+    }
+    BODY_SOURCE = "Email"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ai_available = self._verify_ollama()
+
     def _verify_ollama(self):
         """Checks if Ollama service is running and Llama3 is present."""
         try:
+            import ollama     # slow to import (httpx); only needed once monitoring starts
             models_info = ollama.list()
             # Support both 'llama3' and 'llama3:latest' naming
             available = any("llama3" in m['name'] for m in models_info.get('models', []))
@@ -93,102 +79,15 @@ class MailWorker:
             self.log("SYSTEM: Ollama not detected. Running in Keyword Mode (Safe).")
             return False
 
-    def extract_company(self, subject, body):
-        if self.ai_enabled:
-            try:
-                prompt = f"Extract company name from: '{subject}'. Reply ONLY with the name."
-                res = ollama.chat(model="llama3", messages=[{"role": "user", "content": prompt}])
-                return res["message"]["content"].strip()
-            except: pass
-        
-        # Fallback keyword logic
-        return subject.split(":")[0] if ":" in subject else "Detected Entity"
+    def check_ollama_status(self):
+        # Verified once against the local models when monitoring starts
+        return self.ai_available
 
-    def check_excel(self, path, target_id):
-        try:
-            wb = load_workbook(path, data_only=True)
-            content_dump = ""
-            for sheet in wb.worksheets:
-                for row in sheet.iter_rows(values_only=True):
-                    row_str = " ".join([str(c) for c in row if c])
-                    if target_id.lower() in row_str.lower():
-                        return True, "Keyword Match"
-                    content_dump += row_str + "\n"
-            
-            if self.ai_enabled:
-                prompt = f"Does this list contain ID {target_id}? Context: {content_dump[:1000]}. Answer YES or NO."
-                res = ollama.chat(model="llama3", messages=[{"role": "user", "content": prompt}])
-                if "YES" in res["message"]["content"].upper():
-                    return True, "AI Inference"
-            
-            return False, ""
-        except Exception as e:
-            self.log(f"Excel Error: {e}")
-            return False, ""
+    def excel_verdict(self, found):
+        return f"{'Keyword Match' if exact(found) else 'Fuzzy Match'} ({describe(found)})"
 
-    def run_check(self):
-        user, pw = os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASS")
-        target = os.getenv("TARGET_ID")
-        
-        if not all([user, pw, target]):
-            self.log("CRITICAL: Check credentials in Settings!")
-            return
-
-        try:
-            mail = imaplib.IMAP4_SSL(os.getenv("IMAP_SERVER", "imap.gmail.com"))
-            mail.login(user, pw)
-            mail.select("inbox")
-            
-            # Scan only unseen mail from today
-            date_tag = datetime.now().strftime("%d-%b-%Y")
-            _, data = mail.search(None, f'(UNSEEN SINCE "{date_tag}")')
-
-            if not data[0]:
-                self.log("Scan: Clear. No new signals.")
-            else:
-                for num in data[0].split():
-                    _, msg_data = mail.fetch(num, '(RFC822)')
-                    msg = email.message_from_bytes(msg_data[0][1])
-                    
-                    # Decode Subject safely
-                    raw_subj = decode_header(msg["Subject"])[0]
-                    subj = raw_subj[0].decode(raw_subj[1] or 'utf-8') if isinstance(raw_subj[0], bytes) else raw_subj[0]
-                    
-                    self.log(f"Processing: {subj[:25]}...")
-                    body = ""
-                    if msg.is_multipart():
-                        for part in msg.walk():
-                            if part.get_content_type() == "text/plain":
-                                body += part.get_payload(decode=True).decode(errors='ignore')
-                    else:
-                        body = msg.get_payload(decode=True).decode(errors='ignore')
-
-                    company = self.extract_company(subj, body)
-
-                    # Body Check
-                    if target.lower() in (subj + body).lower():
-                        self.log(f"MATCH: {company}")
-                        self.db.log_match(company, "Email", subj)
-                        self.on_success(company)
-                    
-                    # Attachment Check
-                    for part in msg.walk():
-                        if part.get_content_disposition() == "attachment":
-                            fname = part.get_filename()
-                            if fname and fname.endswith(".xlsx"):
-                                os.makedirs("attachments", exist_ok=True)
-                                path = f"attachments/{fname}"
-                                with open(path, "wb") as f: f.write(part.get_payload(decode=True))
-                                match, reason = self.check_excel(path, target)
-                                if match:
-                                    self.log(f"ATTACHMENT MATCH: {company} ({reason})")
-                                    self.db.log_match(company, f"Excel: {fname}", reason)
-                                    self.on_success(company)
-                    
-                    mail.store(num, '+FLAGS', '\\Seen')
-            mail.logout()
-        except Exception as e:
-            self.log(f"Network: {e}")
+    def excel_hit(self, fname, reason):
+        return f"Excel: {fname}", reason
 
 # --- UI COMPONENTS ---
 class CyberButton(ctk.CTkButton):
@@ -207,6 +106,8 @@ class CyberEntry(ctk.CTkEntry):
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
+        self.logs = LogBuffer.from_env()
+        self.after(LOG_DRAIN_MS, self.drain_log)
         self.title("ID WATCHER // V1.0-MAC")
         self.geometry("1000x650")
         self.configure(fg_color=THEME["bg_primary"])
@@ -237,6 +138,7 @@ class App(ctk.CTk):
         self.main_container.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
 
         self.worker_running = False
+        self.db = Database(DB_PATH)     # one connection for History and the workers
         self.dash_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
         self.hist_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
         self.set_frame = ctk.CTkFrame(self.main_container, fg_color="transparent")
@@ -289,12 +191,12 @@ class App(ctk.CTk):
                       text_color="black", command=self.save_settings).grid(row=10, column=0, sticky="w", pady=30)
 
     def log(self, message):
-        def _update():
-            self.log_box.configure(state="normal")
-            self.log_box.insert("end", f"[{datetime.now().strftime('%H:%M:%S')}] {message}\n")
-            self.log_box.see("end")
-            self.log_box.configure(state="disabled")
-        self.after(0, _update)
+        # Any thread: queued here, drawn by drain_log on the Tk thread
+        self.logs.write(message)
+
+    def drain_log(self):
+        show(self.log_box, self.logs.drain(), self.logs.max_lines)
+        self.after(LOG_DRAIN_MS, self.drain_log)
 
     def toggle_monitoring(self):
         if not self.worker_running:
@@ -310,16 +212,28 @@ class App(ctk.CTk):
             self.status_text.configure(text="OFFLINE", text_color="grey")
 
     def bg_loop(self):
-        worker = MailWorker(self.log, self.trigger_alert)
-        while self.worker_running:
-            worker.run_check()
-            interval = int(os.getenv("CHECK_INTERVAL", 30))
-            for _ in range(interval):
-                if not self.worker_running: break
-                time.sleep(1)
-
-    def trigger_alert(self, company):
-        notification.notify(title="ID MATCH FOUND", message=f"Target detected in: {company}", timeout=10)
+        from neotracker.llm import LlmScheduler     # pulls in requests; not needed until monitoring starts
+        try:
+            accounts = load_accounts()
+        except Exception as e:
+            self.log(f"CRITICAL: Accounts file unreadable: {e}")
+            self.worker_running = False
+            return
+        multi, db, scanner = len(accounts) > 1, self.db, ScanPool()
+        llm = LlmScheduler("llama3", concurrency=int(os.getenv("LLM_CONCURRENCY", 2)), log=self.log)
+        llm.client.warm_up()
+        workers = [MailWorker((lambda m, u=a.user: self.log(f"[{u}] {m}")) if multi else self.log, self.trigger_alert, None, a, db, scanner, llm,
+                              self.refresh_history)
+                   for a in accounts]
+        interval = int(os.getenv("CHECK_INTERVAL", 30))
+        AccountPool(workers, interval, int(os.getenv("MAX_WORKERS", 8)), self.log).run(lambda: self.worker_running)
+        scanner.close()
+        db.flush()
+        llm.close()
+
+    def trigger_alert(self, company, ids):
+        from plyer import notification
+        notification.notify(title="ID MATCH FOUND", message=f"{', '.join(ids)} detected in: {company}", timeout=10)
 
     def show_dashboard(self): self.switch_frame(self.dash_frame)
     def show_history(self): self.load_history_data(); self.switch_frame(self.hist_frame)
@@ -334,10 +248,17 @@ class App(ctk.CTk):
         load_dotenv(ENV_FILE, override=True)
         messagebox.showinfo("Success", "Configuration Saved.")
 
+    def refresh_history(self):
+        self.after(0, lambda: self.hist_frame.winfo_ismapped() and self.load_history_data())
+
     def load_history_data(self):
         for i in self.tree.get_children(): self.tree.delete(i)
-        for row in Database().get_all(): self.tree.insert("", "end", values=row)
+        for row in self.db.get_all(): self.tree.insert("", "end", values=row)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # spreadsheet scan workers in the frozen .exe
     app = App()
+    if os.getenv("NEOTRACKER_STARTUP_PROBE"):
+        # benchmarks/bench_startup.py: report once the window is up, then exit
+        app.after(0, lambda: (print("first-window", flush=True), app.destroy()))
     app.mainloop()
\ No newline at end of file
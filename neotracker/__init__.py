@@ -0,0 +1,2 @@
+# Shared mail engine used by the desktop apps (gui_app.py, gui_app_themed.py, mac/main.py) and the
+# headless watcher (python -m neotracker watch).
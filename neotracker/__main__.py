@@ -0,0 +1,129 @@
+"""Headless watcher: python -m neotracker watch [--notify stdout,webhook,desktop] [--once]
+
+Runs the same MailWorker engine as the desktop app without importing any GUI toolkit, so it
+works on servers and in containers. Configuration comes from the environment (EMAIL_USER,
+EMAIL_PASS, TARGET_ID, ACCOUNTS_FILE, CHECK_INTERVAL, AI_MODEL, ...), optionally loaded from
+an env file. Logs go to stderr as JSON lines; match events go to the chosen notifiers."""
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+
+from neotracker.accounts import AccountPool, load_accounts
+from neotracker.db import Database
+from neotracker.llm import LlmScheduler
+from neotracker.notify import build_notifiers
+from neotracker.scanpool import ScanPool
+from neotracker.worker import MailWorker
+
+ENV_FILE = os.path.join(os.path.expanduser("~"), ".placement_watcher.env")
+log = logging.getLogger("neotracker")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"), "level": record.levelname.lower()}
+        if getattr(record, "account", None):
+            entry["account"] = record.account
+        entry["msg"] = record.getMessage()
+        if record.exc_info:
+            entry["error"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def load_env(path):
+    # python-dotenv is only needed when there is a file to read
+    if not path or not os.path.exists(path):
+        return
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        log.warning(f"python-dotenv not installed, ignoring {path}")
+        return
+    load_dotenv(path)
+
+
+def watch(args):
+    load_env(args.env)
+    # Defaults come from the env file just loaded, not the environment argparse saw
+    db_path = args.db or os.getenv("HISTORY_DB") or "history.db"
+    interval = args.interval or int(os.getenv("CHECK_INTERVAL") or 30)
+    try:
+        notifiers = build_notifiers(args.notify, args.webhook or os.getenv("WEBHOOK_URL"))
+        accounts = load_accounts()
+    except Exception as e:
+        log.error(f"❌ {e}")
+        return 2
+    if not accounts or not all(a.user and a.password and a.target_id for a in accounts):
+        log.error("❌ Credentials missing: set EMAIL_USER, EMAIL_PASS and TARGET_ID or ACCOUNTS_FILE.")
+        return 2
+
+    def alert(user):
+        def send(company, ids):
+            event = {"event": "match", "ts": datetime.now().isoformat(timespec="seconds"), "account": user, "company": company,
+                     "ids": ids}
+            for notifier in notifiers:
+                notifier.send(event)
+        return send
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    # Scan processes only start once a spreadsheet arrives: most --once runs never see one
+    db, scanner = Database(db_path), ScanPool(lazy=True)
+    llm = LlmScheduler(os.getenv("AI_MODEL") or "llama3", concurrency=int(os.getenv("LLM_CONCURRENCY", 2)), log=log.info)
+    if not args.no_ai:
+        llm.client.warm_up()
+    workers = [MailWorker(lambda m, u=a.user: log.info(m, extra={"account": u}), alert(a.user), None, a, db, scanner, llm)
+               for a in accounts]
+    if args.no_ai:
+        for worker in workers:
+            worker.check_ollama_status = lambda w=worker: False
+    log.info(f"Watching {len(workers)} account(s), notifying via {args.notify}")
+    failed = 0
+    try:
+        if args.once:
+            for worker in workers:
+                failed += not worker.run_check()
+                worker.session.close()
+        else:
+            AccountPool(workers, interval, int(os.getenv("MAX_WORKERS", 8)), log.info).run(lambda: not stop.is_set())
+    finally:
+        scanner.close()
+        db.close()
+        llm.close()
+    if failed:
+        log.error(f"❌ {failed} of {len(workers)} check(s) failed")
+        return 1
+    log.info("Stopped.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m neotracker", description="Placement ID watcher without the GUI.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmd = sub.add_parser("watch", help="monitor the mailbox(es) and notify on matches")
+    cmd.add_argument("--notify", default="stdout", help="comma-separated: stdout, webhook, desktop (default: stdout)")
+    cmd.add_argument("--webhook", help="URL the webhook notifier POSTs match events to (default: $WEBHOOK_URL)")
+    cmd.add_argument("--env", default=os.getenv("NEOTRACKER_ENV", ENV_FILE), help="env file with the settings (default: %(default)s)")
+    cmd.add_argument("--db", help="history database (default: $HISTORY_DB or history.db)")
+    cmd.add_argument("--interval", type=int, help="seconds between polls without IDLE (default: $CHECK_INTERVAL or 30)")
+    cmd.add_argument("--once", action="store_true", help="check every account once and exit (for cron); non-zero if a check failed")
+    cmd.add_argument("--no-ai", action="store_true", help="never ask Ollama; name companies from the subject only")
+    cmd.add_argument("--log-format", choices=["json", "text"], default="json")
+    cmd.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if args.log_format == "json" else logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logging.basicConfig(level=args.log_level.upper(), handlers=[handler])
+    return watch(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+
+
+class Account:
+    """One mailbox to watch: its own credentials, server and target IDs."""
+
+    def __init__(self, user, password, server="imap.gmail.com", target_id=""):
+        self.user = user
+        self.password = password
+        self.server = server or "imap.gmail.com"
+        self.target_id = target_id
+
+    def __repr__(self):
+        return f"Account({self.user!r})"
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.getenv("EMAIL_USER", ""), os.getenv("EMAIL_PASS", ""),
+                   os.getenv("IMAP_SERVER", "imap.gmail.com"), os.getenv("TARGET_ID", ""))
+
+
+def load_accounts(path=None):
+    """Accounts listed in ACCOUNTS_FILE, a JSON list of {"user", "password", "server", "target_id"}
+    objects (server defaults to Gmail, target_id to TARGET_ID). Without one, the single
+    EMAIL_USER/EMAIL_PASS account from the environment."""
+    path = path or os.getenv("ACCOUNTS_FILE")
+    if not path:
+        return [Account.from_env()]
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    return [Account(e["user"], e["password"], e.get("server") or os.getenv("IMAP_SERVER", ""),
+                    e.get("target_id") or os.getenv("TARGET_ID", "")) for e in entries]
+
+
+class AccountPool:
+    """Runs one worker per account (anything with run_check(), session and watcher) on at most
+    max_workers threads. If every account gets a thread, each one waits on its own IDLE
+    connection; otherwise accounts are polled round-robin, each at most once per interval,
+    and a slow mailbox only ever holds up its own slot."""
+
+    def __init__(self, workers, interval, max_workers=MAX_WORKERS, log=print):
+        self.workers = workers
+        self.interval = interval
+        self.max_workers = max(1, max_workers)
+        self.log = log
+
+    def run(self, is_running):
+        try:
+            if len(self.workers) <= self.max_workers:
+                with ThreadPoolExecutor(len(self.workers) or 1, thread_name_prefix="account") as pool:
+                    for worker in self.workers:
+                        pool.submit(self._watch, worker, is_running)
+            else:
+                self._poll(is_running)
+        finally:
+            for worker in self.workers:
+                worker.session.close()
+
+    def _check(self, worker):
+        try:
+            worker.run_check()
+        except Exception as e:
+            self.log(f"⚠️ {worker.session.user}: {e}")
+
+    def _watch(self, worker, is_running):
+        while is_running():
+            self._check(worker)
+            worker.watcher.wait(self.interval, is_running)
+
+    def _poll(self, is_running):
+        due = {worker: 0.0 for worker in self.workers}
+        busy = {}
+        wake = threading.Event()
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="account") as pool:
+            while is_running():
+                wake.clear()
+                now = time.monotonic()
+                for worker, future in list(busy.items()):
+                    if future.done():
+                        del busy[worker]
+                        due[worker] = now + self.interval
+                # Longest-waiting accounts first so nobody starves when the pool is saturated
+                for worker in sorted(due, key=due.get):
+                    if len(busy) >= self.max_workers or due[worker] > now:
+                        break
+                    if worker not in busy:
+                        busy[worker] = pool.submit(self._check, worker)
+                        busy[worker].add_done_callback(lambda _: wake.set())
+                # Sleep until a check finishes or the next account falls due
+                idle = [due[w] for w in due if w not in busy]
+                if len(busy) < self.max_workers and idle:
+                    wake.wait(min(1.0, max(0.0, min(idle) - now)))
+                else:
+                    wake.wait(1.0)
@@ -0,0 +1,58 @@
+import hashlib
+import os
+import tempfile
+
+DEFAULT_CAP_MB = 200
+
+
+class AttachmentStore:
+    """Optional on-disk copy of scanned attachments. Files are named by SHA-256, so repeat
+    forwards of one shortlist share a file, and the oldest-used files are evicted once the
+    directory grows past its cap."""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        # Disabled unless ATTACHMENT_DIR is set; scanning never needs the disk copy
+        root = os.getenv("ATTACHMENT_DIR", "")
+        if not root:
+            return None
+        return cls(root, int(os.getenv("ATTACHMENT_CACHE_MB") or DEFAULT_CAP_MB) * 1024 * 1024)
+
+    def save(self, payload, fname=""):
+        digest = hashlib.sha256(payload).hexdigest()
+        path = os.path.join(self.root, digest + os.path.splitext(fname)[1].lower())
+        if os.path.exists(path):
+            os.utime(path)      # mtime doubles as last-used time for eviction
+            return path
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self.evict()
+        return path
+
+    def evict(self):
+        files = []
+        for entry in os.scandir(self.root):
+            if entry.is_file() and not entry.name.endswith(".part"):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,126 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+SCAN_CACHE_ENTRIES = 5000
+SCAN_CACHE_TTL = 30 * 24 * 3600
+MEMORY_ENTRIES = 256
+MATCH, POSSIBLE = 1, 2      # ScanCache verdict levels (0: no match); POSSIBLE is a near miss, never alerted
+COMPANY_CACHE_ENTRIES = 2000
+# "Fwd: RE: [External] FW:" and friends, however many are stacked up
+SUBJECT_PREFIX_RE = re.compile(r"^(?:\s*(?:re|fwd?|aw|wg|tr)\s*(?:\[\d+\])?\s*:|\s*\[external\])+", re.IGNORECASE)
+
+
+def digest(payload):
+    """SHA-256 of an attachment: its identity in the scan cache and in match history."""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class ScanCache:
+    """Spreadsheet verdicts keyed by the SHA-256 of the attachment bytes and the target IDs, kept
+    in history.db so a re-forwarded shortlist is answered without parsing it (or asking the LLM) again.
+    Entries expire after ttl seconds; beyond max_entries the least recently used go first.
+    Recent verdicts are also held in memory so repeats within a session skip SQLite entirely."""
+
+    def __init__(self, db, max_entries=SCAN_CACHE_ENTRIES, ttl=SCAN_CACHE_TTL):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.recent = OrderedDict()     # key -> (verdict, created)
+        self.lock = threading.Lock()    # several scan threads share one cache
+
+    @staticmethod
+    def key(payload, targets):
+        if isinstance(targets, str):
+            targets = [targets]
+        return digest(payload), "\n".join(sorted({t.strip().upper() for t in targets}))
+
+    def _remember(self, key, verdict, created):
+        self.recent[key] = (verdict, created)
+        self.recent.move_to_end(key)
+        while len(self.recent) > MEMORY_ENTRIES:
+            self.recent.popitem(last=False)
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.recent.get(key)
+            if entry and entry[1] >= now - self.ttl:
+                self.recent.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            row = self.db.get_scan(key[0], key[1], now - self.ttl)
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            verdict = int(row[0] or 0), row[1]
+            self._remember(key, verdict, row[2])
+            return verdict
+
+    def put(self, key, verdict):
+        matched, reason = verdict
+        with self.lock:
+            self._remember(key, (int(matched), reason), time.time())
+        self.db.save_scan(key[0], key[1], matched, reason, self.max_entries, time.time() - self.ttl)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def normalize_subject(subject):
+    """Cache key for a subject: reply/forward prefixes stripped, whitespace collapsed, case folded."""
+    return " ".join(SUBJECT_PREFIX_RE.sub("", subject or "").split()).casefold()
+
+
+class CompanyCache:
+    """Company names the LLM extracted, keyed by normalized subject, so the same shortlist
+    forwarded again (or to every student) never waits on Ollama. Backed by history.db with an
+    in-memory LRU in front; beyond max_entries the least recently used rows are dropped."""
+
+    def __init__(self, db, max_entries=COMPANY_CACHE_ENTRIES):
+        self.db = db
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.recent = OrderedDict()     # normalized subject -> company
+        self.lock = threading.Lock()
+
+    def _remember(self, key, company):
+        self.recent[key] = company
+        self.recent.move_to_end(key)
+        while len(self.recent) > MEMORY_ENTRIES:
+            self.recent.popitem(last=False)
+
+    def get(self, subject):
+        key = normalize_subject(subject)
+        with self.lock:
+            company = self.recent.get(key)
+            if company is None:
+                company = self.db.get_company(key)
+                if company is not None:
+                    self._remember(key, company)
+            else:
+                self.recent.move_to_end(key)
+            if company is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return company
+
+    def put(self, subject, company):
+        key = normalize_subject(subject)
+        if not key or not company:
+            return
+        with self.lock:
+            self._remember(key, company)
+        self.db.save_company(key, company, self.max_entries)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,86 @@
+import re
+import threading
+
+JUNK_RE = re.compile(r"Shortlist(ed)?|Selected|regarding|Placement|Hiring|Online Test|Interview|Round|Batch|202\d", re.IGNORECASE)
+# One pass splits a subject or a name into lowercase comparable words ("J.P. Morgan" -> j p morgan)
+WORD_RE = re.compile(r"[^\W_]+|&")
+# Legal-form words a subject usually leaves out: "Infosys Limited" should also match "Infosys"
+SUFFIXES = {"ltd", "limited", "inc", "pvt", "private", "llp", "llc", "corp", "corporation", "co", "plc", "gmbh"}
+NOT_COMPANIES = {"unknown", "unknown company", "detected entity", "none", "na"}
+NAME_RE = re.compile(r"^[\w&.,'’()-]+(?: [\w&.,'’()-]+)*$")     # no " - " joins or double spaces
+
+
+def fallback_company(subject):
+    """Best guess at the company from the subject alone, for when the LLM is off or still thinking."""
+    clean = subject.replace("Fwd:", "").replace("Re:", "").strip()
+    clean = JUNK_RE.sub("", clean)
+    return clean.strip(" -:|")[:30] if clean.strip() else "Unknown"
+
+
+def _words(text):
+    # Runs of single letters are initials: "J.P. Morgan" and "JP Morgan" both become jp morgan
+    words, initials = [], False
+    for w in WORD_RE.findall(text.casefold()):
+        single = len(w) == 1 and w != "&"
+        if single and initials:
+            words[-1] += w
+        else:
+            words.append(w)
+        initials = single
+    return words
+
+
+def is_placeholder(name):
+    """True for answers like "Unknown" or "N/A" that name no company."""
+    return " ".join(_words(name or "")) in NOT_COMPANIES
+
+
+class CompanyDirectory:
+    """Word trie of company names the LLM has already given us. find() walks a subject once and
+    returns the longest known name in it, so only genuinely new companies need the LLM."""
+
+    def __init__(self, names=()):
+        self.root = {}
+        self.lock = threading.Lock()
+        self.size = 0
+        for name in names:
+            self.add(name)
+
+    @classmethod
+    def from_db(cls, db):
+        return cls(db.known_companies())
+
+    def add(self, name):
+        name = (name or "").strip()
+        words = _words(name)
+        if not NAME_RE.match(name) or len(words) > 6 or is_placeholder(name):
+            return
+        if all(JUNK_RE.fullmatch(w) for w in words):
+            return
+        core = words
+        while len(core) > 1 and (core[-1] in SUFFIXES or core[-1] == "&"):
+            core = core[:-1]
+        with self.lock:
+            for key in {tuple(words), tuple(core)}:
+                node = self.root
+                for w in key:
+                    node = node.setdefault(w, {})
+                if None not in node:
+                    self.size += 1
+                node.setdefault(None, name)
+
+    def find(self, subject):
+        words = _words(subject or "")
+        best, best_len = None, 0
+        for i in range(len(words)):
+            node = self.root.get(words[i])
+            j = i + 1
+            while node is not None:
+                if None in node and j - i > best_len:
+                    best, best_len = node[None], j - i
+                node = node.get(words[j]) if j < len(words) else None
+                j += 1
+        return best
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,318 @@
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+log = logging.getLogger("neotracker")
+
+WRITE_BATCH = 500       # most writes committed together in one transaction
+WRITER_IDLE = 5         # seconds without writes before the writer thread exits (restarted on demand)
+BUSY_TIMEOUT_MS = 5000
+SEARCH_WORD_RE = re.compile(r"\w+")
+
+# Schema history, applied in order and tracked in PRAGMA user_version. Append, never edit a shipped step.
+MIGRATIONS = [
+    # 1: the tables as they were before versioning (so existing history.db files pass through unchanged)
+    ["""CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT,
+            company TEXT,
+            source TEXT,
+            details TEXT
+        )""",
+     # Last processed UID per mailbox folder; only valid while UIDVALIDITY is unchanged
+     """CREATE TABLE IF NOT EXISTS sync_state (
+            account TEXT,
+            folder TEXT,
+            uidvalidity INTEGER,
+            last_uid INTEGER,
+            highestmodseq INTEGER,
+            PRIMARY KEY (account, folder)
+        )""",
+     # Scan verdicts per attachment content (SHA-256) and target ID set
+     """CREATE TABLE IF NOT EXISTS scan_cache (
+            digest TEXT,
+            targets TEXT,
+            matched INTEGER,
+            reason TEXT,
+            created REAL,
+            last_used REAL,
+            PRIMARY KEY (digest, targets)
+        )""",
+     # LLM-extracted company per normalized subject
+     """CREATE TABLE IF NOT EXISTS company_cache (
+            subject TEXT PRIMARY KEY,
+            company TEXT,
+            last_used REAL
+        )"""],
+    # 2: one row per (message, attachment) so reprocessed mail doesn't duplicate history; legacy rows
+    # have no message_id and never collide. Indexes for the History view and company lookups.
+    ["ALTER TABLE matches ADD COLUMN message_id TEXT",
+     "ALTER TABLE matches ADD COLUMN attachment TEXT NOT NULL DEFAULT ''",
+     "CREATE UNIQUE INDEX IF NOT EXISTS matches_message ON matches (message_id, attachment)",
+     "CREATE INDEX IF NOT EXISTS matches_timestamp ON matches (timestamp)",
+     "CREATE INDEX IF NOT EXISTS matches_company ON matches (company)"],
+    # 3: full-text index over company/source/details, kept in step with matches by triggers
+    ["""CREATE VIRTUAL TABLE IF NOT EXISTS matches_fts USING fts5(
+            company, source, details, content='matches', content_rowid='id', prefix='2 3'
+        )""",
+     """CREATE TRIGGER IF NOT EXISTS matches_fts_insert AFTER INSERT ON matches BEGIN
+            INSERT INTO matches_fts (rowid, company, source, details) VALUES (new.id, new.company, new.source, new.details);
+        END""",
+     """CREATE TRIGGER IF NOT EXISTS matches_fts_delete AFTER DELETE ON matches BEGIN
+            INSERT INTO matches_fts (matches_fts, rowid, company, source, details) VALUES ('delete', old.id, old.company, old.source, old.details);
+        END""",
+     """CREATE TRIGGER IF NOT EXISTS matches_fts_update AFTER UPDATE OF company, source, details ON matches BEGIN
+            INSERT INTO matches_fts (matches_fts, rowid, company, source, details) VALUES ('delete', old.id, old.company, old.source, old.details);
+            INSERT INTO matches_fts (rowid, company, source, details) VALUES (new.id, new.company, new.source, new.details);
+        END""",
+     "INSERT INTO matches_fts (matches_fts) VALUES ('rebuild')"],
+    # 4: scan_cache.matched becomes a level (cache.MATCH / cache.POSSIBLE); verdicts cached under the
+    # looser fuzzy rules would keep alerting on near misses, so they are dropped and rescanned
+    ["DELETE FROM scan_cache"],
+]
+
+
+def _connect(db_name):
+    conn = sqlite3.connect(db_name, check_same_thread=False, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")     # WAL stays consistent; a power cut may drop the last commits
+    return conn
+
+
+class Database:
+    """history.db in WAL mode. Reads run on a shared connection under a lock; writes go through a
+    queue to one writer thread that commits everything queued so far in a single transaction.
+    Writes whose result nobody needs return at once; the rest wait for their commit."""
+
+    def __init__(self, db_name="history.db"):
+        self.db_name = db_name
+        self.conn = _connect(db_name)
+        self.lock = threading.RLock()
+        self.writes = queue.Queue()
+        self.writer_lock = threading.Lock()
+        self.writer = None
+        self.commits = 0
+        self.migrate()
+
+    def migrate(self):
+        with self.lock:
+            # IMMEDIATE takes the write lock first, so two instances can't both apply a step
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+                for steps in MIGRATIONS[version:]:
+                    for sql in steps:
+                        self.conn.execute(sql)
+                if version < len(MIGRATIONS):
+                    self.conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    # --- WRITER ---
+    def _write(self, fn, wait=False):
+        future = Future()
+        with self.writer_lock:
+            self.writes.put((fn, future))
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._write_loop, daemon=True, name="db-writer")
+                self.writer.start()
+        if wait:
+            return future.result()
+        future.add_done_callback(self._report)
+        return future
+
+    @staticmethod
+    def _report(future):
+        if future.exception():
+            log.error(f"⚠️ DB write failed: {future.exception()}")
+
+    def _write_loop(self):
+        conn = _connect(self.db_name)
+        while True:
+            try:
+                batch = [self.writes.get(timeout=WRITER_IDLE)]
+            except queue.Empty:
+                with self.writer_lock:
+                    if self.writes.empty():
+                        self.writer = None
+                        conn.close()
+                        return
+                continue
+            # Group commit: whatever queued up during the last commit goes into this one
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self.writes.get_nowait())
+                except queue.Empty:
+                    break
+            results = {}
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for fn, future in batch:
+                    if fn is None:
+                        continue
+                    # A failing write only rolls back itself, whatever it raised
+                    conn.execute("SAVEPOINT job")
+                    try:
+                        results[future] = fn(conn), None
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO job")
+                        results[future] = None, e
+                    conn.execute("RELEASE job")
+                conn.execute("COMMIT")
+                self.commits += 1
+            except Exception as e:
+                results = {future: (None, e) for _, future in batch}
+                try:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+            finally:
+                # Every future gets an answer, or a caller waiting on log_match() blocks for good
+                for _, future in batch:
+                    result, error = results.get(future, (None, None))
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+
+    def flush(self):
+        """Waits until every write queued so far is committed."""
+        self._write(None, wait=True)
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+    # --- HISTORY ---
+    def log_match(self, company, source, details, message_id=None, attachment=""):
+        """Row id of the new match, or None if this message/attachment was already recorded."""
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def insert(conn):
+            cursor = conn.execute("INSERT OR IGNORE INTO matches (timestamp, company, source, details, message_id, attachment) "
+                                  "VALUES (?, ?, ?, ?, ?, ?)", (ts, company, source, details, message_id, attachment or ""))
+            return cursor.lastrowid if cursor.rowcount else None
+        return self._write(insert, wait=True)
+
+    def update_company(self, ids, company):
+        """Future resolved once the rows are committed."""
+        return self._write(lambda conn: conn.executemany("UPDATE matches SET company = ? WHERE id = ?", [(company, i) for i in ids]))
+
+    def get_all(self):
+        with self.lock:
+            cursor = self.conn.execute("SELECT timestamp, company, source, details FROM matches ORDER BY id DESC")
+            return cursor.fetchall()
+
+    @staticmethod
+    def _filters(text=None, since=None, until=None, source=None):
+        # text: every word must appear (as a word prefix) in company, source or details;
+        # since/until: inclusive dates ("2024-05-01" or date objects); source: prefix like "Excel"
+        where, args = [], []
+        words = SEARCH_WORD_RE.findall(text or "")
+        if words:
+            where.append("id IN (SELECT rowid FROM matches_fts WHERE matches_fts MATCH ?)")
+            args.append(" ".join(f'"{w}"*' for w in words))
+        if since:
+            where.append("timestamp >= ?")
+            args.append(str(since))
+        if until:
+            where.append("timestamp < date(?, '+1 day')")
+            args.append(str(until))
+        if source:
+            where.append("source LIKE ?")
+            args.append(source.replace("%", "") + "%")
+        return where, args
+
+    def search(self, text=None, since=None, until=None, source=None, before_id=None, limit=100, offset=0):
+        """Newest matches first, (id, timestamp, company, source, details), filtered as in _filters
+        and starting below before_id. Keyset on the rowid, so deep pages cost the same as the first;
+        offset is for one-off jumps to a position no neighbouring page is known for."""
+        where, args = self._filters(text, since, until, source)
+        if before_id is not None:
+            where.append("id < ?")
+            args.append(before_id)
+        sql = "SELECT id, timestamp, company, source, details FROM matches"
+        with self.lock:
+            return self.conn.execute(sql + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id DESC LIMIT ? OFFSET ?",
+                                     args + [limit, offset]).fetchall()
+
+    def get_page(self, before_id=None, limit=100):
+        return self.search(before_id=before_id, limit=limit)
+
+    def count(self, text=None, since=None, until=None, source=None):
+        where, args = self._filters(text, since, until, source)
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM matches" + (" WHERE " + " AND ".join(where) if where else ""),
+                                     args).fetchone()[0]
+
+    def clear_all(self):
+        self._write(lambda conn: conn.execute("DELETE FROM matches"), wait=True)
+
+    # --- SYNC STATE ---
+    def get_checkpoint(self, account, folder):
+        self.flush()
+        with self.lock:
+            return self.conn.execute("SELECT uidvalidity, last_uid, highestmodseq FROM sync_state WHERE account = ? AND folder = ?",
+                                     (account, folder)).fetchone()
+
+    def save_checkpoint(self, account, folder, uidvalidity, last_uid, highestmodseq=None):
+        # Not waited for: losing the last few checkpoints in a crash only re-reads mail that the
+        # unique message key then skips
+        self._write(lambda conn: conn.execute("INSERT OR REPLACE INTO sync_state (account, folder, uidvalidity, last_uid, highestmodseq) "
+                                              "VALUES (?, ?, ?, ?, ?)", (account, folder, uidvalidity, last_uid, highestmodseq)))
+
+    # --- CACHES ---
+    def get_scan(self, digest, targets, min_created):
+        with self.lock:
+            row = self.conn.execute("SELECT matched, reason, created FROM scan_cache WHERE digest = ? AND targets = ? AND created >= ?",
+                                    (digest, targets, min_created)).fetchone()
+        if row:
+            now = time.time()
+            self._write(lambda conn: conn.execute("UPDATE scan_cache SET last_used = ? WHERE digest = ? AND targets = ?",
+                                                  (now, digest, targets)))
+        return row
+
+    def save_scan(self, digest, targets, matched, reason, max_entries, min_created):
+        now = time.time()
+
+        def save(conn):
+            conn.execute("INSERT OR REPLACE INTO scan_cache (digest, targets, matched, reason, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                         (digest, targets, int(matched), reason, now, now))
+            conn.execute("DELETE FROM scan_cache WHERE created < ?", (min_created,))
+            conn.execute("""DELETE FROM scan_cache WHERE rowid IN
+                            (SELECT rowid FROM scan_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)""", (max_entries,))
+        self._write(save)
+
+    def get_company(self, subject):
+        with self.lock:
+            row = self.conn.execute("SELECT company FROM company_cache WHERE subject = ?", (subject,)).fetchone()
+        if row:
+            now = time.time()
+            self._write(lambda conn: conn.execute("UPDATE company_cache SET last_used = ? WHERE subject = ?", (now, subject)))
+        return row[0] if row else None
+
+    def save_company(self, subject, company, max_entries):
+        now = time.time()
+
+        def save(conn):
+            conn.execute("INSERT OR REPLACE INTO company_cache (subject, company, last_used) VALUES (?, ?, ?)",
+                         (subject, company, now))
+            conn.execute("""DELETE FROM company_cache WHERE rowid IN
+                            (SELECT rowid FROM company_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)""", (max_entries,))
+        self._write(save)
+
+    def known_companies(self):
+        # Only LLM answers: matches.company also holds regex fallbacks like "Students"
+        with self.lock:
+            rows = self.conn.execute("SELECT DISTINCT company FROM company_cache").fetchall()
+            return [r[0] for r in rows if r[0]]
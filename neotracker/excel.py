@@ -0,0 +1,152 @@
+import posixpath
+import re
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+# Only this many shared strings are remembered for previews; matches are tracked by index
+PREVIEW_STRINGS = 5000
+CELL_REF_RE = re.compile(r"([A-Z]+)(\d+)")
+
+
+def _local(tag):
+    return tag.rpartition("}")[2]
+
+
+def _column_letter(n):
+    s = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        s = chr(65 + rem) + s
+    return s
+
+
+def _text(el):
+    # Rich text keeps its runs in <r><t>; phonetic hints live under <rPh> and are not cell content
+    parts = []
+    for child in el:
+        name = _local(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name in ("r", "is"):
+            parts.append(_text(child))
+    return "".join(parts)
+
+
+def _number(value):
+    # Numeric cells hold IEEE text such as "871540", "871540.0000001" or "8.7154E5"
+    try:
+        f = float(value)
+    except ValueError:
+        return value
+    return str(int(f)) if f.is_integer() and abs(f) < 1e15 else value
+
+
+def _ref(c, col_no, row_no):
+    m = CELL_REF_RE.match(c.get("r") or "")
+    return m.group(0) if m else f"{_column_letter(col_no)}{row_no}"
+
+
+def _stream(zf, name, tag):
+    """Yields (element, namespace) for each completed <tag>, then drops it from its parent so
+    memory stays flat however many rows the part has."""
+    stack, full = [], None
+    with zf.open(name) as f:
+        for event, el in iterparse(f, events=("start", "end")):
+            if event == "start":
+                if full is None:
+                    ns = el.tag[:el.tag.index("}") + 1] if el.tag.startswith("{") else ""
+                    full = ns + tag
+                stack.append(el)
+                continue
+            stack.pop()
+            if el.tag == full:
+                yield el, full[:-len(tag)]
+                if stack:
+                    stack[-1].remove(el)
+
+
+def _sheets(zf):
+    """(title, member) for each worksheet, in workbook order."""
+    names = set(zf.namelist())
+    try:
+        rels = {}
+        for el, _ in _stream(zf, "xl/_rels/workbook.xml.rels", "Relationship"):
+            target = el.get("Target", "")
+            rels[el.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        sheets = []
+        for el, _ in _stream(zf, "xl/workbook.xml", "sheet"):
+            rid = next((v for k, v in el.attrib.items() if _local(k) == "id"), None)
+            if rels.get(rid) in names:
+                sheets.append((el.get("name"), rels[rid]))
+        if sheets:
+            return sheets
+    except KeyError:
+        pass
+    return [(posixpath.basename(n)[:-4], n) for n in sorted(names) if n.startswith("xl/worksheets/") and n.endswith(".xml")]
+
+
+def scan_workbook(source, matcher, preview_chars=0):
+    """Streams every sheet of an .xlsx (path or file object) through an IdMatcher in one pass and
+    stops as soon as every target ID has been seen exactly. Memory stays flat whatever the size.
+    Returns (found, preview): found maps each ID to (cell, confidence), like ("Sheet1!B12", 1.0),
+    keeping the best hit per ID; preview holds up to preview_chars of row text."""
+    found = {}
+    with zipfile.ZipFile(source) as zf:
+        hits, strings = {}, {}
+        if "xl/sharedStrings.xml" in zf.namelist():
+            for i, (si, _) in enumerate(_stream(zf, "xl/sharedStrings.xml", "si")):
+                text = _text(si)
+                ids = matcher.match(text)
+                if ids:
+                    hits[i] = ids
+                if preview_chars and i < PREVIEW_STRINGS:
+                    strings[i] = text
+
+        preview, size = [], 0
+        for title, member in _sheets(zf):
+            row_no = 0
+            texts = []
+            for el, ns in _stream(zf, member, "row"):
+                row_no = int(el.get("r") or row_no + 1)
+                col_no = 0
+                texts.clear()
+                for c in el:
+                    col_no += 1
+                    kind = c.get("t")
+                    if kind == "inlineStr":
+                        text = _text(c)
+                        ids = matcher.match(text)
+                    else:
+                        text = c.findtext(ns + "v")
+                        if text is None:
+                            continue
+                        if kind == "s":
+                            ids = hits.get(int(text))
+                            text = strings.get(int(text), "")
+                        else:
+                            text = _number(text) if kind in (None, "n") else text
+                            ids = matcher.match(text)
+                    if ids:
+                        for i, confidence in ids.items():
+                            if confidence > found.get(i, ("", 0.0))[1]:
+                                found[i] = f"{title}!{_ref(c, col_no, row_no)}", confidence
+                        if len(found) == len(matcher) and all(conf == 1.0 for _, conf in found.values()):
+                            return found, ""
+                    if text and size < preview_chars:
+                        texts.append(text)
+                if texts and size < preview_chars:
+                    line = " ".join(texts)
+                    preview.append(line)
+                    size += len(line) + 1
+    return found, "\n".join(preview)[:preview_chars]
+
+
+def describe(found):
+    """Match details like "NEO871540 @ Sheet1!B12, NEO871541 @ Sheet2!C3 (75%)"."""
+    return ", ".join(f"{i} @ {cell}" + (f" ({conf:.0%})" if conf < 1 else "")
+                     for i, (cell, conf) in sorted(found.items()))
+
+
+def exact(found):
+    """True if every hit in found is an exact match rather than a near miss."""
+    return all(conf == 1.0 for _, conf in found.values())
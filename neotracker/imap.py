@@ -0,0 +1,415 @@
+import email
+import imaplib
+import random
+import re
+import select
+import socket
+import ssl
+import threading
+import time
+from datetime import datetime
+
+from neotracker.mime import MailItem, decode_part, decode_text, item_from_message, parse_fetch, to_text, wanted_sections
+
+# RFC 2177 asks clients to re-issue IDLE at least every 29 minutes
+IDLE_TIMEOUT = 29 * 60
+KEEPALIVE = 120           # NOOP a connection that sat unused longer than this
+BACKOFF_BASE = 2
+BACKOFF_MAX = 300
+FETCH_BATCH_SIZE = 50     # messages per UID FETCH round trip
+PREFILTER_MAX_TERMS = 25  # longer OR chains are slower than just downloading the text parts
+PREFILTER_HEAD_BYTES = 256 * 1024   # text parts the server search missed are still read up to here
+DROP_ERRORS = (imaplib.IMAP4.abort, OSError, socket.timeout)
+WAKE_RE = re.compile(rb"^\* \d+ (EXISTS|RECENT)\b", re.IGNORECASE)
+UID_RE = re.compile(rb"\bUID (\d+)")
+DIGITS_RE = re.compile(r"\d+")
+
+
+class ReconnectPending(Exception):
+    pass
+
+
+def supports_idle(mail):
+    return "IDLE" in mail.capabilities
+
+
+def _readable(mail, timeout):
+    """True once a line can be read without blocking. imaplib reads through a buffered file, so
+    a response that arrived with the last one may already sit in its buffer where select() can't
+    see it; a non-blocking peek finds those (and SSL's decrypted bytes) before falling back to select."""
+    sock = mail.sock
+    saved = sock.gettimeout()
+    sock.setblocking(False)
+    try:
+        if mail.file.peek(1):
+            return True
+    except (BlockingIOError, ssl.SSLWantReadError):
+        pass
+    finally:
+        sock.settimeout(saved)
+    r, _, _ = select.select([sock], [], [], timeout)
+    return bool(r)
+
+
+def idle(mail, timeout=IDLE_TIMEOUT, should_stop=None):
+    """Blocks in IDLE until EXISTS/RECENT arrives, the timeout lapses or should_stop() is true.
+    Returns True if the mailbox reported new mail. Reads go through imaplib's own buffered file,
+    so nothing it already buffered is skipped and nothing after the tagged OK is lost."""
+    def read_line():
+        line = mail.readline()
+        if not line:
+            raise mail.abort("socket error: EOF during IDLE")
+        return line.rstrip(b"\r\n")
+
+    tag = mail._new_tag()
+    mail.send(tag + b" IDLE\r\n")
+    woke = False
+    while True:
+        line = read_line()
+        if line.startswith(b"+"):
+            break
+        if WAKE_RE.match(line):     # announced before the server got to our IDLE
+            woke = True
+        elif not line.startswith(b"*"):
+            mail.tagged_commands.pop(tag, None)
+            raise mail.error(f"IDLE rejected: {line!r}")
+
+    deadline = time.monotonic() + timeout
+    try:
+        while not woke and time.monotonic() < deadline:
+            if should_stop and should_stop():
+                break
+            if not _readable(mail, 1.0):
+                continue
+            line = read_line()
+            if line.startswith(b"* BYE"):
+                raise mail.abort(f"server closed IDLE: {line!r}")
+            if WAKE_RE.match(line):
+                woke = True
+    finally:
+        mail.send(b"DONE\r\n")
+
+    while True:
+        line = read_line()
+        if line.startswith(tag):
+            mail.tagged_commands.pop(tag, None)
+            if not line[len(tag):].strip().upper().startswith(b"OK"):
+                raise mail.error(f"IDLE failed: {line!r}")
+            return woke
+
+
+def _response_int(mail, code):
+    _, data = mail.response(code)
+    try:
+        return int(data[-1])
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def new_uids(session, db, account):
+    """UIDs that arrived since the stored checkpoint. Without a usable checkpoint (first run,
+    or the server reset UIDVALIDITY) it starts from today's mail."""
+    mail = session.get()
+    checkpoint = db.get_checkpoint(account, session.folder)
+    if checkpoint and checkpoint[0] == session.uidvalidity:
+        last = checkpoint[1]
+        session.new_mail = False    # this search sees everything announced so far
+        _, data = mail.uid("SEARCH", None, f"UID {last + 1}:*")
+    else:
+        last = 0
+        session.new_mail = False
+        today = datetime.now().strftime("%d-%b-%Y")
+        _, data = mail.uid("SEARCH", None, f'SINCE "{today}"')
+        if not data or not data[0]:
+            # Nothing today: baseline at the current end of the mailbox
+            db.save_checkpoint(account, session.folder, session.uidvalidity,
+                               max((session.uidnext or 1) - 1, 0), session.highestmodseq)
+    # "n+1:*" always matches the newest message, even when it is older than n+1
+    return sorted(u for u in (int(x) for x in (data[0] or b"").split()) if u > last) if data else []
+
+
+def fetch_batch(mail, uids):
+    """One UID FETCH for a whole batch; returns {uid: raw message bytes}."""
+    _, data = mail.uid("FETCH", ",".join(map(str, uids)), "(UID BODY.PEEK[])")
+    found = {}
+    for part in data or []:
+        if isinstance(part, tuple):
+            m = UID_RE.search(part[0])
+            if m:
+                found[int(m.group(1))] = part[1]
+    return found
+
+
+def _quote(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def search_terms(targets, gmail=False):
+    """What to ask the server for. It only sees raw text, so "NEO-871540" or "neo 871540" would miss
+    a plain "NEO871540"; the longest digit run of each ID (leading zeros dropped) is found either way.
+    SEARCH TEXT is a substring match and needs nothing else; Gmail matches whole words, so the ID
+    itself goes in too. The normalized matcher still has the final say on whatever comes back."""
+    terms = []
+    for t in targets:
+        runs = DIGITS_RE.findall(t)
+        digits = max(runs, key=len).lstrip("0") if runs else ""
+        for term in ([t.strip()] if gmail or not digits else []) + ([digits] if digits else []):
+            if term and term not in terms:
+                terms.append(term)
+    return terms
+
+
+def search_hits(mail, uids, targets):
+    """UIDs in the batch whose subject/body may contain one of the targets according to the server's
+    own index (X-GM-RAW on Gmail, SEARCH TEXT elsewhere). None if the server could not answer."""
+    gmail = "X-GM-EXT-1" in mail.capabilities
+    terms = search_terms(targets or [], gmail)
+    if not terms or len(terms) > PREFILTER_MAX_TERMS:
+        return None
+    if gmail:
+        criteria = ["X-GM-RAW", _quote(" OR ".join(_quote(t) for t in terms))]
+    else:
+        criteria = ["OR"] * (len(terms) - 1)
+        for t in terms:
+            criteria += ["TEXT", _quote(t)]
+    try:
+        typ, data = mail.uid("SEARCH", None, "UID", ",".join(map(str, uids)), *criteria)
+    except mail.error:
+        return None
+    if typ != "OK":
+        return None
+    return {int(x) for x in (data[0] or b"").split()}
+
+
+def _text_part(got, section, encoding):
+    if not section.endswith("<0>"):
+        return decode_part(got.get(f"BODY[{section}]".encode()), encoding)
+    raw = got.get(f"BODY[{section[:-3]}]<0>".encode()) or b""
+    if encoding == "base64":
+        raw = raw[:raw.rfind(b"\n") + 1]      # whole lines only: a cut mid-quantum won't decode
+    return decode_part(raw, encoding)
+
+
+def fetch_items(mail, uids, targets=None):
+    """Two-phase fetch: ENVELOPE + BODYSTRUCTURE for the batch, then only the text and spreadsheet
+    sections. Messages sharing a layout share one FETCH. Returns {uid: MailItem}.
+    With targets the server search is only a hint: its index lags delivery and can't see every
+    spelling the matcher accepts ("871 540", OCR slips), so a miss never skips a body. It only
+    caps oversized text parts to their first PREFILTER_HEAD_BYTES, which are still scanned."""
+    _, data = mail.uid("FETCH", ",".join(map(str, uids)), "(UID ENVELOPE BODYSTRUCTURE)")
+    meta = parse_fetch(data)
+    hits = search_hits(mail, uids, targets)
+
+    plans, groups, fallback = {}, {}, []
+    for uid in uids:
+        info = meta.get(uid)
+        try:
+            texts, sheets = wanted_sections(info[b"BODYSTRUCTURE"])
+        except Exception:
+            fallback.append(uid)
+            continue
+        missed = hits is not None and uid not in hits
+        # Section plus the partial-fetch suffix for a capped part
+        texts = [(s + ("<0>" if missed and size > PREFILTER_HEAD_BYTES else ""), enc, charset) for s, enc, charset, size in texts]
+        plans[uid] = (info.get(b"ENVELOPE"), texts, sheets)
+        sections = tuple(s for s, *_ in texts + sheets)
+        if sections:
+            groups.setdefault(sections, []).append(uid)
+
+    parts = {}
+    for sections, group in groups.items():
+        spec = " ".join(f"BODY.PEEK[{s[:-3]}]<0.{PREFILTER_HEAD_BYTES}>" if s.endswith("<0>") else f"BODY.PEEK[{s}]"
+                        for s in sections)
+        _, data = mail.uid("FETCH", ",".join(map(str, group)), f"(UID {spec})")
+        parts.update(parse_fetch(data))
+
+    items = {}
+    for uid, (envelope, texts, sheets) in plans.items():
+        got = parts.get(uid, {})
+        body = "".join(to_text(_text_part(got, s, enc), charset) for s, enc, charset in texts)
+        attachments = [(fname, decode_part(got.get(f"BODY[{s}]".encode()), enc)) for s, enc, fname in sheets]
+        envelope = envelope if isinstance(envelope, list) else []
+        subject = decode_text(envelope[1]) if len(envelope) > 1 else ""
+        message_id = (decode_text(envelope[9]) if len(envelope) > 9 else "") or None
+        items[uid] = MailItem(uid, subject, body, attachments, message_id)
+
+    if fallback:
+        for uid, raw in fetch_batch(mail, fallback).items():
+            items[uid] = item_from_message(uid, email.message_from_bytes(raw))
+    return items
+
+
+class Checkpoint:
+    """Advances the stored last UID only past messages that are completely handled. Messages may
+    finish out of order (and on other threads); anything still in flight is fetched again after
+    a crash."""
+
+    def __init__(self, session, db, account):
+        self.session = session
+        self.db = db
+        self.account = account
+        self.lock = threading.Lock()
+        self.pending = []       # UIDs handed out, in mailbox order
+        self.done = set()
+
+    def track(self, uid):
+        with self.lock:
+            self.pending.append(uid)
+
+    def finish(self, uid):
+        with self.lock:
+            self.done.add(uid)
+            last = None
+            while self.pending and self.pending[0] in self.done:
+                last = self.pending.pop(0)
+                self.done.discard(last)
+            if last is not None:
+                self.db.save_checkpoint(self.account, self.session.folder, self.session.uidvalidity,
+                                        last, self.session.highestmodseq)
+
+
+def fetch_new(session, db, account, batch_size=FETCH_BATCH_SIZE, targets=None, checkpoint=None):
+    """Yields a MailItem for each new mail, fetched batch_size at a time. BODY.PEEK leaves the
+    \\Seen flag alone, and the checkpoint only advances once the caller is done with a message:
+    when it asks for the next one, or, if it passed its own Checkpoint, when it calls finish(uid)."""
+    uids = new_uids(session, db, account)
+    batch_size = max(1, batch_size)
+    deferred = checkpoint is not None
+    checkpoint = checkpoint or Checkpoint(session, db, account)
+    for i in range(0, len(uids), batch_size):
+        chunk = uids[i:i + batch_size]
+        items = fetch_items(session.get(), chunk, targets)
+        for uid in chunk:
+            item = items.pop(uid, None)
+            checkpoint.track(uid)
+            if item is not None:
+                yield item
+            if item is None or not deferred:
+                checkpoint.finish(uid)
+
+
+class ImapSession:
+    """One logged-in, folder-selected connection kept alive across check cycles.
+    Dead connections are dropped and reopened with exponential backoff plus jitter."""
+
+    def __init__(self, server, user, password, log, folder="inbox", ssl=True):
+        host, _, port = server.partition(":")
+        self.host = host or "imap.gmail.com"
+        self.port = int(port) if port else (imaplib.IMAP4_SSL_PORT if ssl else imaplib.IMAP4_PORT)
+        self.user = user
+        self.password = password
+        self.log = log
+        self.folder = folder
+        self.ssl = ssl
+        self.mail = None
+        self.uidvalidity = None
+        self.uidnext = None
+        self.highestmodseq = None
+        self.last_used = 0
+        self.failures = 0
+        self.retry_at = 0
+        self.new_mail = False   # EXISTS/RECENT seen since the last new-mail search
+
+    def _open(self):
+        cls = imaplib.IMAP4_SSL if self.ssl else imaplib.IMAP4
+        mail = cls(self.host, self.port)
+        try:
+            mail.login(self.user, self.password)
+            if "CONDSTORE" in mail.capabilities and "ENABLE" in mail.capabilities:
+                mail.enable("CONDSTORE")
+            typ, data = mail.select(self.folder)
+            if typ != "OK":
+                raise mail.error(f"SELECT {self.folder} failed: {data}")
+            self.uidvalidity = _response_int(mail, "UIDVALIDITY")
+            self.uidnext = _response_int(mail, "UIDNEXT")
+            self.highestmodseq = _response_int(mail, "HIGHESTMODSEQ")
+        except Exception:
+            try: mail.shutdown()
+            except Exception: pass
+            raise
+        return mail
+
+    def _backoff(self):
+        self.failures += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        self.retry_at = time.monotonic() + delay
+        return delay
+
+    def get(self):
+        if self.mail is not None and time.monotonic() - self.last_used > KEEPALIVE:
+            try:
+                self.mail.noop()
+            except DROP_ERRORS as e:
+                self.log(f"IMAP keepalive failed, reconnecting: {e}")
+                self.drop()
+
+        if self.mail is None:
+            wait = self.retry_at - time.monotonic()
+            if wait > 0:
+                raise ReconnectPending(f"IMAP reconnect backing off ({wait:.0f}s left)")
+            try:
+                self.mail = self._open()
+            except Exception as e:
+                self.log(f"IMAP connect failed, retrying in {self._backoff():.0f}s: {e}")
+                raise
+            self.failures = 0
+
+        # imaplib appends every unsolicited response forever; a long-lived session must not pile them up.
+        # Servers announce new mail once, with whatever command is running, so remember it first.
+        if "EXISTS" in self.mail.untagged_responses or "RECENT" in self.mail.untagged_responses:
+            self.new_mail = True
+        self.mail.untagged_responses.clear()
+        self.last_used = time.monotonic()
+        return self.mail
+
+    def check_error(self, e):
+        # Protocol/socket failures leave the connection unusable; anything else keeps it.
+        # Failed connects already backed off in get(), so only a dropped live connection counts here.
+        if isinstance(e, DROP_ERRORS) and self.mail is not None:
+            self.drop()
+            self._backoff()
+
+    def drop(self):
+        if self.mail is not None:
+            try: self.mail.shutdown()
+            except Exception: pass
+        self.mail = None
+
+    def close(self):
+        if self.mail is not None:
+            try: self.mail.logout()
+            except Exception: pass
+        self.mail = None
+
+
+class IdleWatcher:
+    """Waits for new mail between check cycles: IMAP IDLE when the server has it, plain polling otherwise."""
+
+    def __init__(self, session, log):
+        self.session = session
+        self.log = log
+        self.push = None
+
+    def wait(self, interval, is_running):
+        if self.push is not False:
+            try:
+                mail = self.session.get()
+                if self.push is None:
+                    self.push = supports_idle(mail)
+                    if not self.push:
+                        self.log("Server has no IDLE support, falling back to polling.")
+                if self.push:
+                    # Mail announced during the last cycle's FETCHes won't be announced again in IDLE
+                    if self.session.new_mail:
+                        self.session.new_mail = False
+                    else:
+                        idle(mail, should_stop=lambda: not is_running())
+                    return
+            except Exception as e:
+                self.log(f"IDLE dropped: {e}")
+                self.session.check_error(e)
+
+        for _ in range(interval):
+            if not is_running(): break
+            time.sleep(1)
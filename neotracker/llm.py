@@ -0,0 +1,197 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_URL = "http://localhost:11434"
+OLLAMA_KEEP_ALIVE = "30m"   # how long Ollama keeps the model loaded after a request
+HEALTH_TTL = 30             # seconds a health check result is trusted
+BREAKER_FAILURES = 3        # consecutive failures that open the circuit
+BREAKER_COOLDOWN = 60       # seconds the circuit stays open before Ollama is tried again
+NUM_PREDICT_PER_SUBJECT = 24
+NUM_PREDICT_MAX = 256       # company names are short; don't let the model ramble
+LLM_BATCH_SIZE = 8          # subjects per prompt
+LLM_BATCH_WINDOW = 0.05     # seconds to wait for more subjects before sending a batch
+LLM_CONCURRENCY = 2         # prompts in flight at once (match OLLAMA_NUM_PARALLEL)
+LLM_DEADLINE = 10           # seconds a caller is willing to wait for an answer
+
+BATCH_PROMPT = ("Extract ONLY the company name from each numbered email subject below. "
+                "Reply with a JSON object mapping each number to the company name, "
+                "or \"Unknown\" if a subject names no company.\n{lines}")
+
+
+class OllamaClient:
+    """Keep-alive HTTP session to Ollama with a cached health state and a circuit breaker:
+    after BREAKER_FAILURES failures in a row, calls fail fast for BREAKER_COOLDOWN seconds
+    instead of each waiting out its own timeout."""
+
+    def __init__(self, model="llama3", url=OLLAMA_URL, pool_size=4, log=print):
+        self.model = model
+        self.url = url.rstrip("/")
+        self.log = log
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.lock = threading.Lock()
+        self.ok = False
+        self.checked = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+
+    def _record(self, ok):
+        with self.lock:
+            self.ok, self.checked = ok, time.monotonic()
+            if ok:
+                self.failures = 0
+            else:
+                self.failures += 1
+                if self.failures >= BREAKER_FAILURES:
+                    self.open_until = self.checked + BREAKER_COOLDOWN
+
+    def healthy(self):
+        now = time.monotonic()
+        if now < self.open_until:
+            return False
+        if now - self.checked < HEALTH_TTL:
+            return self.ok
+        try:
+            self._record(self.session.get(self.url + "/", timeout=1).status_code == 200)
+        except requests.RequestException:
+            self._record(False)
+        return self.ok
+
+    def generate(self, prompt, timeout, fmt=None, num_predict=NUM_PREDICT_MAX):
+        if time.monotonic() < self.open_until:
+            raise ConnectionError("Ollama circuit open")
+        data = {"model": self.model, "prompt": prompt, "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE,
+                "options": {"num_predict": min(num_predict, NUM_PREDICT_MAX)}}
+        if fmt:
+            data["format"] = fmt
+        try:
+            resp = self.session.post(f"{self.url}/api/generate", json=data, timeout=max(0.1, timeout))
+            resp.raise_for_status()
+            answer = resp.json().get("response", "")
+        except (requests.RequestException, ValueError):
+            self._record(False)
+            raise
+        self._record(True)
+        return answer
+
+    def warm_up(self):
+        """Loads the model in the background (an empty prompt only loads it) so the first real
+        lookup doesn't pay for the cold start."""
+        def load():
+            if not self.healthy():
+                return
+            try:
+                self.session.post(f"{self.url}/api/generate", json={"model": self.model, "prompt": "",
+                                                                     "keep_alive": OLLAMA_KEEP_ALIVE}, timeout=120)
+                self.log(f"SYSTEM: {self.model} loaded.")
+            except requests.RequestException as e:
+                self.log(f"⚠️ AI warm-up failed: {e}")
+        threading.Thread(target=load, daemon=True).start()
+
+
+class LlmScheduler:
+    """Shared queue for company-name lookups. Subjects submitted within a short window are
+    coalesced into one JSON-mode prompt, at most `concurrency` prompts run against Ollama at
+    once, and every request carries a deadline: past it the future resolves to None and the
+    caller uses its own fallback."""
+
+    def __init__(self, model="llama3", url=OLLAMA_URL, batch_size=LLM_BATCH_SIZE, window=LLM_BATCH_WINDOW,
+                 concurrency=LLM_CONCURRENCY, deadline=LLM_DEADLINE, log=print):
+        self.client = OllamaClient(model, url, max(1, concurrency) + 1, log)
+        self.batch_size = max(1, batch_size)
+        self.window = window
+        self.deadline = deadline
+        self.log = log
+        self.queue = queue.Queue()
+        self.slots = threading.Semaphore(max(1, concurrency))
+        self.pool = ThreadPoolExecutor(max(1, concurrency), thread_name_prefix="llm")
+        self.prompts = 0
+        threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def submit(self, subject, deadline=None):
+        """Future for the company named in subject: a string, or None on timeout/failure."""
+        future = Future()
+        self.queue.put((subject, time.monotonic() + (deadline or self.deadline), future))
+        return future
+
+    def extract(self, subject, deadline=None):
+        """Blocking lookup; None once the deadline passes, even if Ollama is still busy."""
+        deadline = deadline or self.deadline
+        try:
+            return self.submit(subject, deadline).result(timeout=deadline)
+        except TimeoutError:
+            return None
+
+    def close(self):
+        self.queue.put(None)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            batch = [job]
+            end = time.monotonic() + self.window
+            while len(batch) < self.batch_size:
+                try:
+                    job = self.queue.get(timeout=max(0.0, end - time.monotonic()))
+                except queue.Empty:
+                    break
+                if job is None:
+                    self.queue.put(None)
+                    break
+                batch.append(job)
+            # Waits here (not in the pool) while every slot is busy, so the next batch keeps filling up
+            self.slots.acquire()
+            try:
+                self.pool.submit(self._run, batch)
+            except RuntimeError:
+                self.slots.release()
+                for _, _, future in batch:
+                    future.set_result(None)
+                return
+
+    def _run(self, batch):
+        try:
+            now = time.monotonic()
+            live = []
+            for job in batch:
+                if job[1] <= now:
+                    job[2].set_result(None)
+                else:
+                    live.append(job)
+            if not live:
+                return
+            if not self.client.healthy():
+                # Down or circuit open: let callers fall back now rather than at their deadline
+                for _, _, future in live:
+                    future.set_result(None)
+                return
+            names = self._ask([subject for subject, _, _ in live], min(d for _, d, _ in live) - now)
+            for i, (_, _, future) in enumerate(live, 1):
+                future.set_result(names.get(str(i)))
+        except Exception as e:
+            self.log(f"⚠️ AI Failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+        finally:
+            self.slots.release()
+
+    def _ask(self, subjects, timeout):
+        lines = "\n".join(f"{i}. {' '.join(s.split())}" for i, s in enumerate(subjects, 1))
+        self.prompts += 1
+        answer = self.client.generate(BATCH_PROMPT.format(lines=lines), timeout, fmt="json",
+                                      num_predict=NUM_PREDICT_PER_SUBJECT * len(subjects))
+        answer = json.loads(answer or "{}")
+        if not isinstance(answer, dict):
+            return {}
+        return {str(k).strip(" ."): str(v).replace('"', "").replace("'", "").strip()
+                for k, v in answer.items() if isinstance(v, (str, int, float)) and str(v).strip()}
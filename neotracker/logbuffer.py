@@ -0,0 +1,69 @@
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+LOG_LINES = 5000        # lines queued in memory and kept in the on-screen log
+LOG_DRAIN_MS = 100      # how often the UI flushes queued lines into the textbox
+LOG_FILE_MB = 5
+LOG_FILE_BACKUPS = 3
+
+
+class LogBuffer:
+    """Log lines from any thread, shown by the UI in batches. write() only appends to a deque
+    (atomic in CPython, so workers never take a lock or touch Tk); the UI thread drains it on a
+    timer. The queue and the textbox (via show()) are both capped at max_lines, so a 24/7 run
+    can't grow without limit. With a path, every line also goes to a rotating log file."""
+
+    def __init__(self, max_lines=LOG_LINES, stamp="%H:%M:%S", path=None, max_bytes=LOG_FILE_MB * 1024 * 1024,
+                 backups=LOG_FILE_BACKUPS):
+        self.max_lines = max_lines
+        self.pending = deque(maxlen=max_lines)     # a stalled UI drops the oldest lines, not memory
+        self.stamp = stamp
+        self.file = None
+        if path:
+            self.file = logging.getLogger(f"neotracker.log.{os.path.abspath(path)}")
+            self.file.propagate = False
+            self.file.setLevel(logging.INFO)
+            if not self.file.handlers:
+                handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                self.file.addHandler(handler)
+
+    @classmethod
+    def from_env(cls, stamp="%H:%M:%S"):
+        # LOG_FILE enables the spill file; off by default
+        return cls(int(os.getenv("LOG_LINES") or LOG_LINES), stamp, os.getenv("LOG_FILE") or None,
+                   int(os.getenv("LOG_FILE_MB") or LOG_FILE_MB) * 1024 * 1024)
+
+    def write(self, msg):
+        self.pending.append(f"[{datetime.now().strftime(self.stamp)}] {msg}")
+        if self.file:
+            self.file.info(msg)
+
+    def drain(self):
+        """Lines written since the last drain, oldest first. UI thread only."""
+        lines = []
+        try:
+            while True:
+                lines.append(self.pending.popleft())
+        except IndexError:
+            pass
+        return lines
+
+
+def show(textbox, lines, max_lines=LOG_LINES):
+    """Appends lines to a CTkTextbox in one insert, trims it to max_lines and scrolls once."""
+    if not lines:
+        return
+    readonly = textbox.cget("state") == "disabled"
+    if readonly:
+        textbox.configure(state="normal")
+    textbox.insert("end", "\n".join(lines) + "\n")
+    excess = int(textbox.index("end-1c").split(".")[0]) - 1 - max_lines
+    if excess > 0:
+        textbox.delete("1.0", f"{excess + 1}.0")
+    textbox.see("end")
+    if readonly:
+        textbox.configure(state="disabled")
@@ -0,0 +1,162 @@
+import re
+from collections import deque
+from functools import lru_cache
+
+# Separators people put inside IDs ("NEO-871 540", "neo_871540") are ignored on both sides
+SEPARATORS_RE = re.compile(r"[\W_]+")
+SPLIT_RE = re.compile(r"[,;\r\n]+")     # not spaces: "NEO 871540" is one ID
+# Spreadsheet numbers come back as "871540.0"; IDs get typed with or without leading zeros
+FLOAT_TAIL_RE = re.compile(r"(?<=\d)\.0+(?!\d)")
+LEADING_ZEROS_RE = re.compile(r"(?<!\d)0+(?=\d)")
+# Characters OCR and hurried typing swap for one another, folded together for fuzzy matching
+OCR_FOLD = str.maketrans("OQDILZSB", "00011258")
+# Letters OCR still mixes up after folding; any other substitution is a different ID, not a typo
+OCR_PAIRS = {frozenset(p) for p in ("CG", "EF", "UV", "MN", "PR")}
+FUZZY_EDITS = 1
+FUZZY_MIN_LENGTH = 6        # shorter IDs only match exactly; one edit away is too many false hits
+CONFIDENCE = {0: 0.9, 1: 0.75, 2: 0.5}     # by edit distance after OCR folding; exact hits are 1.0
+
+
+def normalize(text):
+    text = FLOAT_TAIL_RE.sub("", text)
+    return LEADING_ZEROS_RE.sub("", SEPARATORS_RE.sub("", text).upper())
+
+
+def fuzzy_key(text):
+    # Fold before dropping leading zeros, so "NEO0…" and "NE00…" agree
+    text = FLOAT_TAIL_RE.sub("", text)
+    return LEADING_ZEROS_RE.sub("", SEPARATORS_RE.sub("", text).upper().translate(OCR_FOLD))
+
+
+def _automaton(patterns):
+    """Aho-Corasick over (key, payload) pairs. Failure links are folded into the transition table,
+    so scanning costs one dict lookup per character. Returns (delta, out)."""
+    goto, out = [{}], [()]
+    for key, payload in patterns:
+        node = 0
+        for ch in key:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[node][ch] = nxt
+                goto.append({})
+                out.append(())
+            node = nxt
+        out[node] += (payload,)
+
+    # BFS order guarantees a node's failure target is complete before the node itself
+    fail = [0] * len(goto)
+    delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        delta[node] = dict(delta[fail[node]])
+        delta[node].update(goto[node])
+        for ch, nxt in goto[node].items():
+            fail[nxt] = delta[fail[node]].get(ch, 0) if node else 0
+            out[nxt] += out[fail[nxt]]
+            queue.append(nxt)
+    return delta, out
+
+
+def _scan(delta, out, text, found):
+    node = 0
+    for ch in text:
+        node = delta[node].get(ch, 0)
+        if out[node]:
+            found.update(out[node])
+    return found
+
+
+def _deletes(key, k):
+    """key plus every string k or fewer deletions away from it."""
+    out = frontier = {key}
+    for _ in range(k):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out = out | frontier
+    return out
+
+
+def _distance(a, b, limit):
+    """Edit distance between OCR-folded a and b, or None above limit. Digits are never inserted,
+    dropped or swapped and letters only swap within OCR_PAIRS: 87154, 8715430 and NEO871541 are
+    other students than NEO871540, and 22BCT1034 another than 22BCE1034."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    never = limit + 1
+
+    def indel(ch):
+        return never if ch.isdigit() else 1
+
+    prev = [0]
+    for y in b:
+        prev.append(prev[-1] + indel(y))
+    for x in a:
+        cur = [prev[0] + indel(x)]
+        for j, y in enumerate(b, 1):
+            sub = 0 if x == y else (1 if frozenset((x, y)) in OCR_PAIRS else never)
+            cur.append(min(prev[j - 1] + sub, prev[j] + indel(x), cur[j - 1] + indel(y)))
+        if min(cur) > limit:
+            return None
+        prev = cur
+    return prev[-1] if prev[-1] <= limit else None
+
+
+class IdMatcher:
+    """Aho-Corasick automaton over any number of target IDs. One pass over a text reports every
+    ID it contains, case-insensitively and ignoring spaces, separators, leading zeros and a
+    trailing ".0". match() also reports near misses (OCR swaps, up to max_edits dropped or doubled
+    letters) with a confidence below 1; callers treat those as possible matches, not hits."""
+
+    def __init__(self, ids, max_edits=FUZZY_EDITS):
+        self.ids = sorted({i.strip() for i in ids if normalize(i)})
+        self.max_edits = max_edits
+        self.delta, self.out = _automaton((normalize(t), t) for t in self.ids)
+
+        # Deletion neighbourhoods (as in SymSpell): two strings within k edits share a string
+        # reachable from both by at most k deletions, so candidates come from one dict lookup each
+        self.folded = {t: fuzzy_key(t) for t in self.ids}
+        self.variants = {}
+        for t, key in self.folded.items():
+            if max_edits and len(key) >= FUZZY_MIN_LENGTH:
+                for v in _deletes(key, max_edits):
+                    self.variants.setdefault(v, set()).add(t)
+        lengths = [len(k) for t, k in self.folded.items() if len(k) >= FUZZY_MIN_LENGTH]
+        self.lengths = (min(lengths) - max_edits, max(lengths) + max_edits) if lengths else (1, 0)
+
+    def __bool__(self):
+        return bool(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def find(self, text, found=None):
+        """Set of IDs occurring exactly in text (added to found if given)."""
+        return _scan(self.delta, self.out, normalize(text), set() if found is None else found)
+
+    def match(self, text):
+        """{ID: confidence} for text: 1.0 for exact hits, lower for OCR/typo variants. Near misses
+        are judged against the whole cell, or each word of a longer one, never a slice of a word."""
+        exact = self.find(text)
+        result = dict.fromkeys(exact, 1.0)
+        if not self.variants or len(exact) == len(self.ids):
+            return result
+        lo, hi = self.lengths
+        key = fuzzy_key(text)
+        for key in [key] if len(key) <= hi else map(fuzzy_key, text.split()):
+            if not lo <= len(key) <= hi:
+                continue
+            for v in _deletes(key, self.max_edits):
+                for t in self.variants.get(v, ()):
+                    if t in exact:
+                        continue
+                    d = _distance(self.folded[t], key, self.max_edits)
+                    if d is not None and CONFIDENCE.get(d, 0.25) > result.get(t, 0):
+                        result[t] = CONFIDENCE.get(d, 0.25)
+        return result
+
+
+@lru_cache(maxsize=8)
+def matcher_for(config_value, max_edits=FUZZY_EDITS):
+    """TARGET_ID may hold one ID or many separated by commas, semicolons or newlines."""
+    return IdMatcher(SPLIT_RE.split(config_value or ""), max_edits)
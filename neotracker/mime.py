@@ -0,0 +1,180 @@
+import base64
+import quopri
+import re
+from email.header import decode_header, make_header
+from email.utils import collapse_rfc2231_value, decode_params, unquote
+
+# Atoms may carry a section spec with spaces inside, e.g. BODY[HEADER.FIELDS (SUBJECT)]<0>
+TOKEN_RE = re.compile(rb'\s*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|\{(\d+)\}\s*$|([^\s()"\[]+(?:\[[^\]]*\])?(?:<[\d.]+>)?))')
+SPREADSHEET_EXT = (".xlsx",)
+
+
+class MailItem:
+    """What the worker needs from one email: decoded subject, plain-text body and spreadsheet attachments."""
+
+    def __init__(self, uid, subject, body, attachments, message_id=None):
+        self.uid = uid
+        self.subject = subject
+        self.body = body
+        self.attachments = attachments      # [(filename, bytes)]
+        self.message_id = message_id
+        # Filled in by the worker's pipeline stages
+        self.hits = []                      # [(source, details, ids, attachment digest or "")]
+        self.possible = []                  # near misses, shaped like hits: recorded but not alerted
+        self.company = None
+        self.lookup = None                  # Future for the LLM's company name
+
+
+def decode_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", errors="replace")
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return value
+
+
+# --- IMAP RESPONSE PARSING ---
+def _tokens(data):
+    # imaplib splits literals out into (head, literal) tuples; everything else stays bytes
+    for chunk in data:
+        if isinstance(chunk, tuple):
+            head, literal = chunk
+        else:
+            head, literal = chunk, None
+        pos = 0
+        while pos < len(head):
+            m = TOKEN_RE.match(head, pos)
+            if not m or m.end() == pos:
+                break
+            pos = m.end()
+            if m.group(1):
+                yield "("
+            elif m.group(2):
+                yield ")"
+            elif m.group(3) is not None:
+                yield re.sub(rb"\\(.)", rb"\1", m.group(3))
+            elif m.group(4) is not None:
+                yield literal
+            elif m.group(5):
+                atom = m.group(5)
+                yield None if atom.upper() == b"NIL" else atom
+
+
+def parse_fetch(data):
+    """imaplib FETCH data -> {uid: {item name: value}}, with parenthesized lists as Python lists."""
+    out = {}
+    stack = []
+    for tok in _tokens(data or []):
+        if tok == "(":
+            stack.append([])
+        elif tok == ")":
+            if not stack:
+                continue
+            done = stack.pop()
+            if stack:
+                stack[-1].append(done)
+            else:
+                items = dict(zip([k.upper() if isinstance(k, bytes) else k for k in done[0::2]], done[1::2]))
+                if b"UID" in items:
+                    out[int(items[b"UID"])] = items
+        elif stack:
+            stack[-1].append(tok)
+        # tokens outside a list are the message sequence numbers
+    return out
+
+
+# --- BODYSTRUCTURE ---
+def _params(lst):
+    # RFC 2231 (filename*=utf-8''..., filename*0*=... continuations) is how clients send long or
+    # non-ASCII names; decode_params reassembles those, and skips its first pair (the content type)
+    if not isinstance(lst, list):
+        return {}
+    pairs = [(k.decode().lower(), v.decode("utf-8", errors="replace") if isinstance(v, bytes) else "")
+             for k, v in zip(lst[0::2], lst[1::2]) if isinstance(k, bytes)]
+    out = {}
+    for name, value in decode_params([("", "")] + pairs)[1:]:
+        # It hands every value back quoted; plain ones may still be RFC 2047 encoded words
+        out[name] = unquote(collapse_rfc2231_value(value)) if isinstance(value, tuple) else decode_text(unquote(value))
+    return out
+
+
+def _str(value):
+    return value.decode("utf-8", errors="replace").lower() if isinstance(value, bytes) else ""
+
+
+def walk_parts(bs, section=""):
+    """Yields (section, type/subtype, params, encoding, disposition, filename, size) for every leaf part."""
+    if not isinstance(bs, list) or not bs:
+        return
+    if isinstance(bs[0], list):
+        children = []
+        for child in bs:
+            if not isinstance(child, list):
+                break
+            children.append(child)
+        for k, child in enumerate(children, 1):
+            yield from walk_parts(child, f"{section}.{k}" if section else str(k))
+        return
+
+    own = section or "1"
+    ctype = f"{_str(bs[0])}/{_str(bs[1])}"
+    if ctype == "message/rfc822" and len(bs) > 8:
+        inner = bs[8]
+        yield from walk_parts(inner, own if isinstance(inner, list) and inner and isinstance(inner[0], list) else own + ".1")
+        return
+
+    params = _params(bs[2])
+    disp_at = {"text": 9}.get(_str(bs[0]), 8)
+    disposition = bs[disp_at] if len(bs) > disp_at and isinstance(bs[disp_at], list) else None
+    disp_type = _str(disposition[0]) if disposition else ""
+    disp_params = _params(disposition[1]) if disposition and len(disposition) > 1 else {}
+    filename = disp_params.get("filename") or params.get("name") or ""
+    size = int(bs[6]) if len(bs) > 6 and isinstance(bs[6], bytes) and bs[6].isdigit() else 0
+    yield own, ctype, params, _str(bs[5]), disp_type, filename, size
+
+
+def wanted_sections(bs):
+    """Sections worth downloading: inline text/plain bodies (with their size) and spreadsheet attachments."""
+    texts, sheets = [], []
+    for section, ctype, params, encoding, disposition, filename, size in walk_parts(bs):
+        if filename.lower().endswith(SPREADSHEET_EXT):
+            sheets.append((section, encoding, filename))
+        elif ctype == "text/plain" and disposition != "attachment":
+            texts.append((section, encoding, params.get("charset") or "utf-8", size))
+    return texts, sheets
+
+
+def decode_part(raw, encoding):
+    if raw is None:
+        return b""
+    if encoding == "base64":
+        return base64.b64decode(raw)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(raw)
+    return raw
+
+
+def to_text(raw, charset):
+    try:
+        return raw.decode(charset, errors="ignore")
+    except LookupError:
+        return raw.decode("utf-8", errors="ignore")
+
+
+# --- FALLBACK: FULL MESSAGE ---
+def item_from_message(uid, msg):
+    body = ""
+    attachments = []
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        fname = part.get_filename()
+        if part.get_content_disposition() == "attachment":
+            if fname and fname.lower().endswith(SPREADSHEET_EXT):
+                attachments.append((decode_text(fname), part.get_payload(decode=True) or b""))
+        elif part.get_content_type() == "text/plain":
+            body += (part.get_payload(decode=True) or b"").decode(errors="ignore")
+    return MailItem(uid, decode_text(msg["Subject"]), body, attachments, msg["Message-ID"])
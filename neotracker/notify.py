@@ -0,0 +1,81 @@
+import json
+import logging
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+log = logging.getLogger("neotracker")
+
+
+class StdoutNotifier:
+    """One JSON object per event on stdout, for pipes and process supervisors."""
+
+    def send(self, event):
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+
+
+class WebhookNotifier:
+    """POSTs each event as JSON (e.g. to a local ntfy/Home Assistant/n8n endpoint). Sent off the
+    worker thread, so a slow endpoint never holds up the mail pipeline."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.pool = ThreadPoolExecutor(2, thread_name_prefix="webhook")
+
+    def send(self, event):
+        self.pool.submit(self._post, event)
+
+    def _post(self, event):
+        try:
+            self.session.post(self.url, json=event, timeout=self.timeout).raise_for_status()
+        except requests.RequestException as e:
+            log.warning(f"Webhook failed: {e}")
+
+
+class DesktopNotifier:
+    """Native notification where the platform has one: winotify on Windows, osascript on macOS,
+    notify-send on Linux desktops. Without any of them it logs once and stays quiet."""
+
+    def __init__(self):
+        self.missing = False
+
+    def send(self, event):
+        title, msg = "MATCH FOUND!", f"Company: {event.get('company')} ({', '.join(event.get('ids') or [])})"
+        try:
+            if sys.platform == "win32":
+                from winotify import Notification
+                Notification(app_id="Placement Watcher", title=title, msg=msg, duration="long").show()
+            elif sys.platform == "darwin":
+                subprocess.run(["osascript", "-e", f"display notification {json.dumps(msg)} with title {json.dumps(title)}"],
+                               check=False, timeout=5)
+            elif shutil.which("notify-send"):
+                subprocess.run(["notify-send", title, msg], check=False, timeout=5)
+            else:
+                raise OSError("notify-send not found")
+        except (ImportError, OSError, subprocess.SubprocessError) as e:
+            if not self.missing:
+                log.warning(f"Desktop notifications unavailable: {e}")
+                self.missing = True
+
+
+NOTIFIERS = {"stdout": StdoutNotifier, "webhook": WebhookNotifier, "desktop": DesktopNotifier}
+
+
+def build_notifiers(names, webhook_url=None):
+    """Notifiers for a comma-separated list like "stdout,webhook"."""
+    notifiers = []
+    for name in filter(None, (n.strip().lower() for n in names.split(","))):
+        if name not in NOTIFIERS:
+            raise ValueError(f"unknown notifier {name!r} (choose from {', '.join(NOTIFIERS)})")
+        if name == "webhook":
+            if not webhook_url:
+                raise ValueError("the webhook notifier needs --webhook URL or WEBHOOK_URL")
+            notifiers.append(WebhookNotifier(webhook_url))
+        else:
+            notifiers.append(NOTIFIERS[name]())
+    return notifiers
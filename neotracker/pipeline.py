@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+
+PIPELINE_QUEUE = 8
+_DONE = object()
+
+
+class Stage:
+    """One step of a Pipeline. fn(item) returns the item for the next stage, or None when there
+    is nothing more to do with it. Slow I/O-bound steps can be given more than one worker."""
+
+    def __init__(self, name, fn, workers=1, maxsize=PIPELINE_QUEUE):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue = queue.Queue(maxsize)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.peak = 0            # deepest the queue got
+        self.wait_time = 0.0     # seconds items spent queued in front of this stage
+        self.run_time = 0.0      # seconds spent inside fn
+
+    def put(self, item):
+        # Blocks while the queue is full: backpressure on whoever is feeding this stage
+        self.queue.put((item, time.perf_counter()))
+        self.peak = max(self.peak, self.queue.qsize())
+
+    def record(self, waited, ran, ok):
+        with self.lock:
+            self.processed += 1
+            self.failed += not ok
+            self.wait_time += waited
+            self.run_time += ran
+
+    def stats(self):
+        n = self.processed or 1
+        return {"depth": self.queue.qsize(), "peak": self.peak, "processed": self.processed, "failed": self.failed,
+                "wait_ms": self.wait_time / n * 1000, "run_ms": self.run_time / n * 1000}
+
+
+class Pipeline:
+    """Pushes items from a source iterator through stages that each run on their own thread(s).
+    Stages are joined by bounded queues, so network-bound stages overlap CPU-bound ones and a
+    slow stage holds back the ones before it instead of letting mail pile up in memory.
+    An exception only drops the item that raised it."""
+
+    def __init__(self, stages, log=print, source_name="fetch"):
+        self.stages = stages
+        self.log = log
+        self.source = Stage(source_name, None)
+
+    def _work(self, index, on_done):
+        stage = self.stages[index]
+        nxt = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            entry = stage.queue.get()
+            if entry is _DONE:
+                return
+            item, queued = entry
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item)
+                ok = True
+            except Exception as e:
+                result, ok = None, False
+                self.log(f"⚠️ {stage.name} failed for {getattr(item, 'subject', item)!r}: {e}")
+            stage.record(start - queued, time.perf_counter() - start, ok)
+            if result is not None and nxt is not None:
+                nxt.put(result)
+            elif on_done:
+                try:
+                    on_done(item)
+                except Exception as e:
+                    self.log(f"⚠️ {stage.name}: {e}")
+
+    def run(self, source, on_done=None):
+        """Feeds every item from source through the stages and waits for them to drain. on_done
+        (item) runs once per item however it left the pipeline. Returns the number of items read;
+        an error raised by the source itself is re-raised after in-flight items have finished."""
+        threads = [[threading.Thread(target=self._work, args=(i, on_done), daemon=True) for _ in range(stage.workers)]
+                   for i, stage in enumerate(self.stages)]
+        for group in threads:
+            for t in group:
+                t.start()
+        count = 0
+        try:
+            it = iter(source)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                self.source.record(0.0, time.perf_counter() - start, True)
+                count += 1
+                self.stages[0].put(item)
+        finally:
+            # Shut down stage by stage so each one drains what the previous stage handed it
+            for stage, group in zip(self.stages, threads):
+                for _ in group:
+                    stage.queue.put(_DONE)
+                for t in group:
+                    t.join()
+        return count
+
+    def stats(self):
+        return {stage.name: stage.stats() for stage in [self.source] + self.stages}
+
+    def summary(self):
+        parts = []
+        for name, s in self.stats().items():
+            failed = f", {s['failed']} failed" if s["failed"] else ""
+            parts.append(f"{name} {s['processed']} @ {s['run_ms']:.1f}ms (queued {s['wait_ms']:.1f}ms, peak depth {s['peak']}{failed})")
+        return " | ".join(parts)
@@ -0,0 +1,78 @@
+import io
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from neotracker.excel import scan_workbook
+from neotracker.matcher import matcher_for
+
+
+def _warm():
+    # Importing this module already loaded the scanner; the task only makes the process start now
+    return os.getpid()
+
+
+def _scan(payload, ids, preview_chars):
+    # The compiled matcher is rebuilt (and lru-cached) per process instead of pickled per task
+    return scan_workbook(io.BytesIO(payload), matcher_for(",".join(ids)), preview_chars)
+
+
+def scan_processes():
+    """SCAN_PROCESSES from the environment; unset means up to 4 cores, 0 scans in-thread."""
+    value = os.getenv("SCAN_PROCESSES", "").strip()
+    return int(value) if value else min(4, os.cpu_count() or 1)
+
+
+class ScanPool:
+    """Runs scan_workbook in worker processes so spreadsheets parse on every core while the IMAP
+    and pipeline threads keep the GIL. Workers are started (and import the scanner) up front, or
+    with lazy=True on the first spreadsheet, so a run that sees none never forks them.
+    Attachment bytes go over as a single pickled buffer; the matcher goes over as its ID list.
+    With processes=0 everything runs in the calling thread."""
+
+    def __init__(self, processes=None, lazy=False):
+        self.processes = scan_processes() if processes is None else max(0, processes)
+        self.executor = None
+        self.started = False
+        self.lock = threading.Lock()
+        if not lazy:
+            self._start()
+
+    def _start(self):
+        self.started = True
+        if self.processes:
+            self.executor = ProcessPoolExecutor(self.processes)
+            wait([self.executor.submit(_warm) for _ in range(self.processes)])
+
+    def submit(self, payload, matcher, preview_chars=0):
+        """Future for (found, preview) of one workbook; collect with as_completed()."""
+        if not self.started:
+            with self.lock:
+                if not self.started:
+                    self._start()
+        if self.executor is None:
+            future = Future()
+            try:
+                future.set_result(scan_workbook(io.BytesIO(payload), matcher, preview_chars))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self.executor.submit(_scan, payload, matcher.ids, preview_chars)
+
+    def scan(self, payload, matcher, preview_chars=0):
+        executor = self.executor
+        try:
+            return self.submit(payload, matcher, preview_chars).result()
+        except BrokenProcessPool:
+            # A worker died (out of memory, killed): start a fresh pool once and scan this one here
+            with self.lock:
+                if self.executor is executor:
+                    self.close()
+                    self._start()
+            return scan_workbook(io.BytesIO(payload), matcher, preview_chars)
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
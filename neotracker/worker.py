@@ -0,0 +1,197 @@
+import os
+
+from neotracker.attachments import AttachmentStore
+from neotracker.cache import MATCH, POSSIBLE, CompanyCache, ScanCache, digest
+from neotracker.company import CompanyDirectory, fallback_company as guess_company, is_placeholder
+from neotracker.excel import describe, exact
+from neotracker.imap import Checkpoint, IdleWatcher, ImapSession, fetch_new
+from neotracker.matcher import matcher_for
+from neotracker.pipeline import Pipeline, Stage
+
+
+class MailWorker:
+    """One account's check cycle: fetch new mail, match the target IDs in bodies and spreadsheets,
+    name the company and record/alert each hit. UI-agnostic: each app and the headless watcher pass
+    their own callbacks, and a subclass can swap MESSAGES and the label hooks for its own wording."""
+
+    # Log line per event, "" for none. Fields: subject, company, ids, details, summary, hits, ai, error
+    MESSAGES = {
+        "no_credentials": "❌ ERROR: Credentials missing.",
+        "start": ">>> SCANNING... (AI Mode: {ai})",
+        "summary": "📊 {summary} | company cache {hits:.0%} hits",
+        "no_mail": "No new emails.",
+        "error": "Connection Error: {error}",
+        "done": "",
+        "checking": "Checking: {subject:.30}...",
+        "duplicate": "↩️ Already recorded: {subject:.30}",
+        "body_match": "🎯 MATCH ({ids}): {company}",
+        "excel_match": "🎯 MATCH in Excel ({ids}): {company}",
+        "possible_match": "🤔 Possible match, not alerted: {details}",
+        "company": "🏢 {subject:.30}... -> {company}",
+    }
+    BODY_SOURCE = "Email Body"
+
+    def __init__(self, log_callback, success_callback, update_ai_status, account, db, scanner, llm, update_callback=None):
+        self.running = False
+        self.account = account
+        self.log = log_callback
+        self.on_success = success_callback
+        self.on_update = update_callback or (lambda: None)
+        self.update_ai_status = update_ai_status or (lambda ok: None)
+        self.db = db
+        self.scanner = scanner
+        self.llm = llm
+        self.ai_available = False
+        self.session = ImapSession(account.server, account.user, account.password, self.log)
+        self.watcher = IdleWatcher(self.session, self.log)
+        self.store = AttachmentStore.from_env()
+        self.scan_cache = ScanCache(self.db)
+        self.company_cache = CompanyCache(self.db)
+        self.directory = CompanyDirectory.from_db(self.db)
+        
+    def get_config(self, key): return os.getenv(key, "")
+
+    def say(self, event, **fields):
+        if self.MESSAGES[event]:
+            self.log(self.MESSAGES[event].format(**fields))
+
+    def excel_verdict(self, found):
+        return f"{'Exact Match' if exact(found) else 'Fuzzy Match'} in Excel: {describe(found)}"
+
+    def excel_hit(self, fname, reason):
+        """(source, details) recorded for a spreadsheet hit."""
+        return "Excel", f"{fname} ({reason})"
+
+    def fallback_company(self, subject):
+        return guess_company(subject)
+
+    def check_ollama_status(self):
+        # Cached for a while and short-circuited while Ollama keeps failing, so this is cheap per cycle
+        self.ai_available = self.llm.client.healthy()
+        self.update_ai_status(self.ai_available)
+        return self.ai_available
+
+    def request_company(self, item):
+        # Same subject (after Fwd:/Re: and spacing) -> same company, without waiting on the LLM again;
+        # otherwise any company the LLM has named before is picked out of the subject directly
+        item.company = self.company_cache.get(item.subject) or self.directory.find(item.subject)
+        if not item.company and self.ai_available:
+            # The shared scheduler folds a burst of subjects into one prompt
+            item.lookup = self.llm.submit(item.subject)
+
+    def company_ready(self, item, rows, company):
+        # The LLM answered after the alert went out: fix up the history rows it produced.
+        # "Unknown" and the like would only overwrite the fallback name and poison the cache
+        if not company or is_placeholder(company): return
+        self.company_cache.put(item.subject, company)
+        self.directory.add(company)
+        self.say("company", subject=item.subject, company=company)
+        # Refresh History once the writer has committed, or the reload still reads the old name
+        self.db.update_company(rows, company).add_done_callback(lambda _: self.on_update())
+
+    def check_excel_simple(self, payload, matcher):
+        key = self.scan_cache.key(payload, matcher.ids)
+        cached = self.scan_cache.get(key)
+        if cached: return cached
+        try:
+            found, _ = self.scanner.scan(payload, matcher)
+            # Only exact hits alert; near misses (a neighbouring roll number, an OCR slip) are possible matches
+            sure = {i: hit for i, hit in found.items() if hit[1] == 1.0}
+            if sure:
+                verdict = MATCH, self.excel_verdict(sure)
+            else:
+                verdict = (POSSIBLE, self.excel_verdict(found)) if found else (0, "")
+            self.scan_cache.put(key, verdict)
+            return verdict
+        except Exception as e:
+            self.log(f"Excel Error: {e}")
+            return 0, ""
+
+    def run_check(self):
+        """One check cycle. False if it could not run (no credentials, connection error)."""
+        email_user, email_pass = self.account.user, self.account.password
+        matcher = matcher_for(self.account.target_id)
+        
+        if not (email_user and email_pass and matcher):
+            self.say("no_credentials")
+            self.running = False
+            return False
+
+        self.check_ollama_status()
+        self.say("start", ai="ON" if self.ai_available else "OFF")
+
+        # fetch -> parse -> scan -> enrich -> notify, each on its own thread: the next batch downloads
+        # while spreadsheets are parsed and Ollama answers, and a bad mail only drops itself
+        self.matcher = matcher
+        self.pipeline = pipeline = Pipeline([Stage("parse", self.parse), Stage("scan", self.scan, workers=max(1, self.scanner.processes)),
+                                             Stage("enrich", self.enrich), Stage("notify", self.notify)], self.log)
+        checkpoint = Checkpoint(self.session, self.db, email_user)
+        try:
+            batch = int(self.get_config("FETCH_BATCH_SIZE") or 50)
+            count = pipeline.run(fetch_new(self.session, self.db, email_user, batch, matcher.ids, checkpoint),
+                                 lambda item: checkpoint.finish(item.uid))
+            if count:
+                self.say("summary", summary=pipeline.summary(), hits=self.company_cache.hit_rate())
+            else:
+                self.say("no_mail")
+        except Exception as e:
+            self.session.check_error(e)
+            self.say("error", error=e)
+            return False
+        finally:
+            self.say("done")
+        return True
+
+    def parse(self, item):
+        self.say("checking", subject=item.subject)
+        ids = self.matcher.find(item.subject + "\n" + item.body)
+        if ids:
+            # The IDs go in the details too: with hundreds of targets, History must say which one hit
+            item.hits.append((self.BODY_SOURCE, f"{', '.join(sorted(ids))}: {item.subject}", ids, ""))
+        if self.store:
+            # The disk copy is optional: a full disk or a permission error must not cost the match
+            for fname, payload in item.attachments:
+                try:
+                    self.store.save(payload, fname)
+                except OSError as e:
+                    self.log(f"⚠️ Attachment copy failed ({fname}): {e}")
+        return item
+
+    def scan(self, item):
+        for fname, payload in item.attachments:
+            level, reason = self.check_excel_simple(payload, self.matcher)
+            if level:
+                hits = item.hits if level == MATCH else item.possible
+                # The verdict (maybe from the cache) names every ID it found
+                hits.append((*self.excel_hit(fname, reason), self.matcher.find(reason), digest(payload)))
+        # Company lookup (possibly an LLM call) only for mail that actually matched
+        return item if item.hits or item.possible else None
+
+    def enrich(self, item):
+        self.request_company(item)
+        return item
+
+    def notify(self, item):
+        # Alert straight away with the cached or regex name; a pending LLM answer patches the rows later
+        company = item.company or self.fallback_company(item.subject)
+        rows = []
+        for source, details, ids, attachment in item.hits:
+            # Reprocessed mail (checkpoint reset, second client) hits the unique key: no second alert
+            row = self.db.log_match(company, source, details, item.message_id, attachment)
+            if row is None:
+                self.say("duplicate", subject=item.subject)
+                continue
+            if attachment:
+                self.say("excel_match", company=company, ids=", ".join(sorted(ids)), details=details)
+            else:
+                self.say("body_match", company=company, ids=", ".join(sorted(ids)), details=details)
+            self.on_success(company, sorted(ids))
+            rows.append(row)
+        for source, details, ids, attachment in item.possible:
+            # Kept in History under its own source for a second look, but no alert
+            row = self.db.log_match(company, f"{source} (possible)", details, item.message_id, attachment)
+            if row is not None:
+                self.say("possible_match", company=company, details=details)
+                rows.append(row)
+        if item.lookup:
+            item.lookup.add_done_callback(lambda f: self.company_ready(item, rows, f.result()))